@@ -0,0 +1,86 @@
+import concurrent.futures
+import os
+from collections import namedtuple
+
+LoadedCollection = namedtuple("LoadedCollection", ["name", "files", "records", "error"])
+
+
+def collection_name(files)->str:
+    """Name a collection after its first export file, without the extension."""
+    return os.path.splitext(os.path.basename(files[0]))[0]
+
+
+def _collection(collection)->tuple:
+    if hasattr(collection, "files"):
+        return collection.name, tuple(collection.files)
+    files = (collection,) if isinstance(collection, str) else tuple(collection)
+    return collection_name(files), files
+
+
+def load_collection(name, files, options):
+    """Load and join the exports of a single collection.
+
+    Any exception raised while loading, such as a :class:`MigrationTools.MetadataReader.RecordMismatch`, is returned
+    as the error of the collection instead of being raised.
+
+    :param name: name of the collection
+    :param files: a xml file, a tsv file or one of each
+    :param options: keyword arguments for :class:`MigrationTools.MetadataReader.CDM_Metadata`
+    :returns: LoadedCollection -- with a RecordBatch of the same records as iterating over CDM_Metadata gives
+    """
+    from .MetadataReader import CDM_Metadata
+    from .RecordBatch import RecordBatch
+    try:
+        records = RecordBatch(CDM_Metadata(*files, **options))
+    except Exception as e:
+        return LoadedCollection(name, files, None, e)
+    return LoadedCollection(name, files, records, None)
+
+
+def load_collections(collections, workers=None, **options):
+    """Generator function that loads many collections at the same time in a pool of processes.
+
+    Each collection is loaded and joined by :class:`MigrationTools.MetadataReader.CDM_Metadata` in a process of its
+    own, and is yielded as soon as it's ready, so the collections can come back in a different order than they were
+    given in. Records are sent back from the processes as a :class:`MigrationTools.RecordBatch.RecordBatch`.
+
+    A collection that fails to load, for example because its xml and tsv exports don't match, is yielded with the
+    exception as its error and no records. The rest of the collections are still loaded.
+
+    :param collections: collections to load. Each is a :class:`MigrationTools.MetadataReader.Items` with a name and
+        files, or just the files, in which case the collection is named after its first file.
+    :param workers: number of processes to use. Defaults to the number of CPUs. With 1, the collections are loaded one
+        at a time in the current process.
+    :param options: keyword arguments for CDM_Metadata, such as cache or columnar
+    :yields: LoadedCollection -- name, files, records and error of a collection
+
+    For example::
+
+        pairs = [("maps.xml", "maps.tsv"), ("posters.xml", "posters.tsv")]
+        for collection in load_collections(pairs, workers=4):
+            if collection.error is not None:
+                print("{} failed: {!r}".format(collection.name, collection.error))
+                continue
+            for record in collection.records:
+                print(record)
+
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    collections = [_collection(collection) for collection in collections]
+
+    if workers == 1:
+        for name, files in collections:
+            yield load_collection(name, files, options)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load_collection, name, files, options): (name, files)
+                   for name, files in collections}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The process loading the collection died or the result couldn't be sent back
+                name, files = futures[future]
+                yield LoadedCollection(name, files, None, e)
@@ -0,0 +1,143 @@
+from collections.abc import Mapping, Sequence
+
+# Once a column has this many rows, stop interning it if most of its values are different from each other. Interning
+# a column like Title or CONTENTdm number costs memory instead of saving it.
+INTERN_SAMPLE_SIZE = 1024
+INTERN_MAX_RATIO = 0.5
+
+
+class ColumnStore(Sequence):
+    """Stores records as one list of values per field instead of one dict per record.
+
+    Values that repeat within a field, such as Rights or Collection, are interned so that every record with the same
+    value shares a single object. Records are returned as read-only :class:`RowView` mappings that behave like the
+    dicts they replace.
+
+    Args:
+        fields: field names
+        default: value for a field that a record doesn't have
+        view: mapping class used to return records
+
+    """
+
+    def __init__(self, fields, default=None, view=None):
+        self.fields = list(fields)
+        self.default = default
+        self.view = RowView if view is None else view
+        self._columns = {field: [] for field in self.fields}
+        self._interned = {field: dict() for field in self.fields}
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("ColumnStore index out of range")
+        return self.view(self, index)
+
+    def __iter__(self):
+        for index in range(self._rows):
+            yield self.view(self, index)
+
+    def _add_field(self, field):
+        self.fields.append(field)
+        self._columns[field] = [self.default] * self._rows
+        self._interned[field] = dict()
+
+    def intern(self, field, value):
+        key = tuple(value) if isinstance(value, list) else value
+        table = self._interned[field]
+        if table is None:
+            return key
+        try:
+            return table.setdefault(key, key)
+        except TypeError:
+            # Not hashable so it can't be shared
+            return key
+
+    def append(self, record: Mapping):
+        """Add a record to the end of the store.
+
+        :param record: mapping of field name to value
+        :returns: RowView -- the added record as it's stored
+        """
+        for field in record:
+            if field not in self._columns:
+                self._add_field(field)
+        for field in self.fields:
+            self._columns[field].append(self.intern(field, record.get(field, self.default)))
+        self._rows += 1
+        if self._rows == INTERN_SAMPLE_SIZE:
+            self._check_interning()
+        return self.view(self, self._rows - 1)
+
+    def _check_interning(self):
+        for field, table in self._interned.items():
+            if table is not None and len(table) > self._rows * INTERN_MAX_RATIO:
+                self._interned[field] = None
+
+    def column(self, field)->list:
+        """Get every value of a single field, in record order."""
+        return self._columns[field]
+
+    def value(self, index, field):
+        return self._columns[field][index]
+
+
+class RowView(Mapping):
+    """A single record in a :class:`ColumnStore`, read like a dict."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: ColumnStore, index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, field):
+        try:
+            column = self._store._columns[field]
+        except KeyError:
+            raise KeyError(field)
+        return column[self._index]
+
+    def __contains__(self, field):
+        return field in self._store._columns
+
+    def __iter__(self):
+        return iter(self._store.fields)
+
+    def __len__(self):
+        return len(self._store.fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self)->dict:
+        return dict(self)
+
+
+class ListRowView(RowView):
+    """A record of a :class:`ColumnStore` holding lists of values, read like the defaultdict(list) it replaces.
+
+    Values are stored as shared tuples and returned as new lists so changing one record can't change another. Reading
+    a field that doesn't exist returns an empty list.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, field):
+        column = self._store._columns.get(field)
+        if column is None:
+            return []
+        value = column[self._index]
+        return list(value) if isinstance(value, tuple) else value
+
+    def get(self, field, default=None):
+        if field not in self._store._columns:
+            return default
+        return self[field]
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import namedtuple
+
+SNAPSHOT_VERSION = 1
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+UNCHANGED = "unchanged"
+
+OBJECT_KEY_FIELDS = ("CONTENTdm number", "cdmid")
+PAGE_KEY_FIELDS = ("CONTENTdm number", "pageptr")
+MODIFIED_FIELDS = ("Date modified", "cdmmodified")
+
+# Fields that depend on where a record is in the export, not on the record itself
+IGNORED_FIELDS = frozenset(["group_id"])
+
+Change = namedtuple("Change", ["status", "key", "record"])
+
+
+def _first(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value:
+            return str(value)
+    return None
+
+
+def record_key(record):
+    """Get the CONTENTdm number that a record or page of CDM_Metadata is compared by, or None if it doesn't have one.
+
+    Pages, which have an XML_order, are keyed by their pageptr so they aren't confused with their object.
+    """
+    return _first(record, PAGE_KEY_FIELDS if "XML_order" in record else OBJECT_KEY_FIELDS)
+
+
+def record_modified(record):
+    """Get the date a record was last modified in CONTENTdm, or None if the export doesn't have it."""
+    return _first(record, MODIFIED_FIELDS)
+
+
+def record_hash(record)->str:
+    """Hash the contents of a record. The same fields and values give the same hash, whatever order they are in."""
+    items = sorted((str(key), value) for key, value in record.items() if key not in IGNORED_FIELDS)
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()
+
+
+class ExportSnapshot:
+    """The CONTENTdm number, modification date and content hash of every record and page of an export, so the next
+    export can be compared to it without keeping the old export around.
+
+    Args:
+        entries: dict of key to a tuple of modification date and content hash
+
+    Example::
+
+        snapshot = ExportSnapshot.from_metadata(CDM_Metadata("export.xml", "export.tsv"))
+        snapshot.save("export.snapshot")
+
+    """
+
+    def __init__(self, entries=None):
+        self.entries = dict() if entries is None else entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def add(self, key, modified, content_hash):
+        self.entries[key] = (modified, content_hash)
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Make a snapshot of every record and page of a CDM_Metadata or any other iterable of records."""
+        snapshot = cls()
+        for record in metadata:
+            key = record_key(record)
+            if key is not None:
+                snapshot.add(key, record_modified(record), record_hash(record))
+        return snapshot
+
+    def save(self, filename):
+        saved = {"version": SNAPSHOT_VERSION, "entries": self.entries}
+        handle, temp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_name, filename)
+        except BaseException:
+            os.remove(temp_name)
+            raise
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            saved = pickle.load(f)
+        if saved.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("{} was saved by a different version and can't be used".format(filename))
+        return cls(saved["entries"])
+
+
+def iter_changes(records, previous, snapshot=None, check_content=False, include_unchanged=False):
+    """Generator function that compares the records of an export to a previous export.
+
+    Records are matched by their CONTENTdm number and pages by their pageptr. A record is unchanged if its
+    modification date is the same as before. If it isn't, or the export doesn't have modification dates, its content
+    hash is compared instead. Records that were in the previous export but aren't anymore are yielded last, as removed
+    with no record.
+
+    Records without a CONTENTdm number can't be matched, so they are always yielded as added with a key of None.
+
+    :param records: records of the new export, such as a CDM_Metadata
+    :param previous: ExportSnapshot of the previous export, or its records
+    :param snapshot: ExportSnapshot to add the new export to while comparing, to save for next time
+    :param check_content: compare the content hash even when the modification date hasn't changed, to find changes
+        that CONTENTdm didn't record, such as a different TSV export joined to the same XML export
+    :param include_unchanged: also yield the records that haven't changed
+    :yields: Change -- status, key and the record
+    """
+    if not isinstance(previous, ExportSnapshot):
+        previous = ExportSnapshot.from_metadata(previous)
+
+    seen = set()
+    for record in records:
+        key = record_key(record)
+        if key is None:
+            yield Change(ADDED, None, record)
+            continue
+        seen.add(key)
+        modified = record_modified(record)
+        old = previous.get(key)
+        if old is None:
+            status = ADDED
+            content_hash = record_hash(record)
+        elif modified is not None and modified == old[0] and not check_content:
+            # Only hashed when the date changes, so unchanged records cost almost nothing
+            status = UNCHANGED
+            content_hash = old[1]
+        else:
+            content_hash = record_hash(record)
+            status = UNCHANGED if content_hash == old[1] else CHANGED
+
+        if snapshot is not None:
+            snapshot.add(key, modified, content_hash)
+        if status != UNCHANGED or include_unchanged:
+            yield Change(status, key, record)
+
+    for key in previous.entries:
+        if key not in seen:
+            yield Change(REMOVED, key, None)
@@ -0,0 +1,196 @@
+"""Timers and counters for finding out where a migration run spends its time.
+
+Instrumentation is off by default and costs next to nothing while it's off. Turn it on with :func:`enable` or by
+setting the environment variable ``MIGRATIONTOOLS_STATS`` to 1 before MigrationTools is imported. If
+``MIGRATIONTOOLS_STATS_FILE`` is also set, the results are written to that file as JSON when Python exits.
+
+Each phase records how many times it ran and its wall clock and CPU time. Phases can be nested, and the time of a
+nested phase is also part of the time of the phase around it. The peak memory use of the process is noted at the end of
+each phase, except for phases that run too often for that to be cheap.
+
+Example::
+
+    from MigrationTools import Instrumentation
+    Instrumentation.enable()
+    records = list(CDM_Metadata("export.xml", "export.tsv"))
+    Instrumentation.dump("stats.json")
+
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+ENV_ENABLE = "MIGRATIONTOOLS_STATS"
+ENV_FILE = "MIGRATIONTOOLS_STATS_FILE"
+
+enabled = False
+_phases = dict()
+_counters = dict()
+_memory = dict()
+_null_phase = contextlib.nullcontext()
+
+
+def enable():
+    """Start recording."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stop recording. What has been recorded so far is kept."""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Forget everything recorded so far."""
+    _phases.clear()
+    _counters.clear()
+    _memory.clear()
+
+
+def peak_memory():
+    """Get the most memory the process has used so far, in bytes, or None if it can't be found out."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives kilobytes and macOS gives bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_memory():
+    """Get how much memory the process is using right now, in bytes. Where that can't be found out, falls back to
+    :func:`peak_memory`, which is never less. Returns None if neither can be found out.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        # No /proc outside of Linux, and no os.sysconf on Windows
+        return peak_memory()
+
+
+def snapshot(label):
+    """Note the peak memory use of the process so far under a label."""
+    if enabled:
+        _memory[label] = peak_memory()
+
+
+def count(name, amount=1):
+    """Add to a counter."""
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def _add_time(name, wall, cpu):
+    phase = _phases.get(name)
+    if phase is None:
+        phase = _phases[name] = {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+    phase["calls"] += 1
+    phase["wall_seconds"] += wall
+    phase["cpu_seconds"] += cpu
+
+
+@contextlib.contextmanager
+def _timed_phase(name, memory):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        _add_time(name, time.perf_counter() - wall, time.process_time() - cpu)
+        if memory:
+            _memory[name] = peak_memory()
+
+
+def phase(name, memory=True):
+    """Context manager that times the code inside it as a phase.
+
+    :param name: name of the phase
+    :param memory: note the peak memory use at the end of the phase. Turn this off for phases that run very often.
+
+    For example::
+
+        with Instrumentation.phase("tsv.load"):
+            records = load(tsv_file)
+
+    """
+    if not enabled:
+        return _null_phase
+    return _timed_phase(name, memory)
+
+
+def timed_iter(name, iterable):
+    """Time how long it takes to get each item from an iterable, such as a generator, without counting the time spent
+    by the code using the items.
+
+    :param name: phase to add the time to
+    :param iterable: items to time
+    :returns: the iterable itself when not enabled, otherwise an iterator over the same items
+    """
+    if not enabled:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+
+def _timed_iter(name, iterator):
+    wall_total = 0.0
+    cpu_total = 0.0
+    try:
+        while True:
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                wall_total += time.perf_counter() - wall
+                cpu_total += time.process_time() - cpu
+            yield item
+    finally:
+        _add_time(name, wall_total, cpu_total)
+        _memory[name] = peak_memory()
+
+
+def report()->dict:
+    """Get everything recorded so far.
+
+    :returns: dict -- phases with their calls and times, counters, and peak memory in bytes at the end of each phase
+    """
+    return {
+        "enabled": enabled,
+        "phases": {name: dict(phase) for name, phase in _phases.items()},
+        "counters": dict(_counters),
+        "memory": dict(_memory, peak=peak_memory()),
+    }
+
+
+def dump(file=None):
+    """Write everything recorded so far as JSON.
+
+    :param file: file name or open text file to write to. Defaults to standard output.
+    """
+    if file is None:
+        file = sys.stdout
+    if isinstance(file, str):
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(report(), f, indent=2)
+    else:
+        json.dump(report(), file, indent=2)
+
+
+if os.environ.get(ENV_ENABLE, "").lower() in ("1", "true", "yes", "on"):
+    enable()
+    if os.environ.get(ENV_FILE):
+        atexit.register(dump, os.environ[ENV_FILE])
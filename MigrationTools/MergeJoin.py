@@ -0,0 +1,86 @@
+"""Join of a XML export to its TSV export that reads both in step, for exports that list their parts in the same order.
+
+CONTENTdm usually exports the TSV rows in the same order as the XML records, with the rows of a compound object's pages
+next to the row of the object. Each XML record is matched to the next rows of the TSV export, so only the rows of one
+object are kept in memory at a time. The CONTENTdm numbers of each object have to come after the numbers of the object
+before it, as they do when CONTENTdm exports a collection. If the rows aren't where they're expected, or the numbers
+go back, the rest of the join falls back to looking them up in a hash table of the TSV export, the same as
+:meth:`CDM_Metadata.create_full`. Because the numbers only ever go up while in step, a number that's in the TSV export
+more than once always gets its first row, as it does in the hash join.
+
+Example::
+
+    for full_record, page_rows in iter_merge_join("export.xml", "export.tsv"):
+        print(full_record["Title"], len(page_rows))
+
+"""
+import itertools
+
+from . import Instrumentation
+from .MetadataReader import CDM_Metadata, FullRecord, Record, RecordMismatch, cdm_metadata_tsv, cdm_metadata_xml
+from .SpillJoin import record_keys
+
+
+def _next_rows(rows, keys)->tuple:
+    # Takes as many rows as there are keys. Returns them in the order of the keys, or None if they don't have exactly
+    # those CONTENTdm numbers, and how many rows were taken.
+    window = dict()
+    taken = 0
+    for row in itertools.islice(rows, len(keys)):
+        taken += 1
+        window.setdefault(cdm_metadata_tsv.record_number(row), row)
+    if len(window) != len(keys):
+        return None, taken
+    try:
+        return [window[key] for key in keys], taken
+    except KeyError:
+        return None, taken
+
+
+def iter_merge_join(xml_file, tsv_file, backend=None):
+    """Generator function that joins a XML export to its TSV export in a single pass over each.
+
+    Gives the same FullRecords in the same order as :meth:`CDM_Metadata.create_full`, along with the TSV rows of the
+    pages. The rows of an object and its pages can be in any order among themselves, as long as they come together, in
+    the same order as the XML records, and after the rows of the objects before them by CONTENTdm number.
+
+    Raises RecordMismatch once the end is reached if the exports don't have the same number of parts, and IndexError
+    if a part of the XML export isn't in the TSV export.
+
+    :param xml_file: ContentDM Metadata XML file name
+    :param tsv_file: ContentDM Metadata TSV file name
+    :param backend: name of the XML parser to use
+    :yields: tuple -- FullRecord and a list of the TSV row of each of its pages
+    """
+    rows = cdm_metadata_tsv.iter_file(tsv_file)
+    lookup = None
+    last_number = -1
+    used_rows = 0
+    parts = 0
+    try:
+        for record in cdm_metadata_xml.iter_file(xml_file, backend=backend):
+            keys = list(record_keys(record))
+            parts += len(keys)
+            found = None
+            if lookup is None:
+                found, taken = _next_rows(rows, keys)
+                used_rows += taken
+                numbers = [int(key) for key in keys]
+                if found is not None and min(numbers) <= last_number:
+                    # Out of order, or the rows found could be later copies of rows already used
+                    found = None
+                if found is None:
+                    Instrumentation.count("MergeJoin.fallbacks")
+                    lookup = CDM_Metadata.tsv_lookup(cdm_metadata_tsv(tsv_file, stream=True))
+                else:
+                    last_number = max(numbers)
+            if found is None:
+                found = [lookup(key) for key in keys]
+                Instrumentation.count("CDM_Metadata.lookups", len(keys))
+            yield FullRecord(Record(found[0]), record.pages), found[1:]
+
+        # After falling back, the rows the in step join didn't get to still have to be counted
+        if used_rows + sum(1 for _ in rows) != parts:
+            raise RecordMismatch
+    finally:
+        rows.close()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+CACHE_VERSION = 3
+CACHE_EXTENSION = ".pickle"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "MigrationTools")
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+def file_hash(filename, block_size=1024 * 1024)->str:
+    """Get a sha256 hash of the contents of a file.
+
+    :param filename: file to hash
+    :param block_size: number of bytes to read at a time
+    :returns: str -- hex digest
+    """
+    hasher = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class MetadataCache:
+    """On disk cache of parsed metadata exports so that opening the same export again doesn't need to parse it again.
+
+    Entries are keyed by the path, size and modification time of the export and, if use_hash is set, a hash of its
+    contents. Changing the export in any of these ways means the cached copy isn't used.
+
+    Once the cache grows past max_size bytes, the least recently used entries are removed.
+
+    Args:
+        cache_dir: directory to keep the cached metadata in
+        max_size: maximum size in bytes for all the cached metadata together
+        use_hash: also hash the contents of the export to tell if it has changed. This is safer but means reading the
+          whole file each time it's opened.
+
+    Example::
+
+        cache = MetadataCache("migration_cache")
+        metadata = cdm_metadata_tsv("export.tsv", cache=cache)
+        print(cache.hits, cache.misses)
+
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE, use_hash=False):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, filename, namespace="")->str:
+        """Build the key for the cached version of a file.
+
+        :param filename: export file
+        :param namespace: separates entries for the same file made by different readers
+        :returns: str -- cache key
+        """
+        stat = os.stat(filename)
+        parts = [str(CACHE_VERSION), namespace, os.path.abspath(filename), str(stat.st_size), str(stat.st_mtime_ns)]
+        if self.use_hash:
+            parts.append(file_hash(filename))
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_EXTENSION)
+
+    def get(self, key):
+        """Get the cached value for a key.
+
+        :param key: cache key
+        :returns: the cached value or None if there isn't one
+        """
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return None
+
+        # The modification time of an entry is used to keep track of when it was last used
+        os.utime(entry)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Add a value to the cache and remove the least recently used entries if the cache is too big.
+
+        :param key: cache key
+        :param value: any picklable value
+        """
+        handle, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_name, self._entry(key))
+        except BaseException:
+            os.remove(temp_name)
+            raise
+        self.evict()
+
+    def load(self, filename, load_data, namespace=""):
+        """Get the parsed data for a file from the cache, or parse it with load_data and cache it.
+
+        :param filename: export file
+        :param load_data: function that takes the filename and parses it
+        :param namespace: separates entries for the same file made by different readers
+        :returns: whatever load_data returns
+        """
+        key = self.key(filename, namespace)
+        value = self.get(key)
+        if value is None:
+            value = load_data(filename)
+            self.put(key, value)
+        return value
+
+    def entries(self)->list:
+        """Get the cached entries from least to most recently used.
+
+        :returns: list of tuples -- file name, size in bytes and last used time
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_EXTENSION):
+                continue
+            entry = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(entry)
+            except FileNotFoundError:
+                continue
+            entries.append((entry, stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    @property
+    def size(self)->int:
+        """Total size in bytes of everything in the cache"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits into max_size."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for entry, size, _ in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove everything from the cache."""
+        for entry, _, _ in self.entries():
+            os.remove(entry)
+
+    def stats(self)->dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries()), "size": self.size}
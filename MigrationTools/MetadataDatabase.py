@@ -0,0 +1,333 @@
+import json
+import os
+import sqlite3
+from collections import defaultdict
+
+from .MetadataReader import Record, cdm_metadata_tsv, cdm_metadata_xml, _check_fields
+from .Schema import Schema
+
+DATABASE_EXTENSION = ".sqlite"
+DATABASE_VERSION = 1
+
+# Number of rows inserted or fetched at a time
+BATCH_SIZE = 1000
+
+OBJECTS = "objects"
+PAGES = "pages"
+
+_CREATE_TABLES = """
+DROP TABLE IF EXISTS meta;
+DROP TABLE IF EXISTS columns;
+DROP TABLE IF EXISTS objects;
+DROP TABLE IF EXISTS pages;
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE columns (table_name TEXT, position INTEGER, field TEXT, column_name TEXT, is_list INTEGER);
+CREATE TABLE objects (id INTEGER PRIMARY KEY, number TEXT);
+CREATE TABLE pages (id INTEGER PRIMARY KEY, object_id INTEGER, page_order INTEGER, pageptr TEXT);
+"""
+
+_CREATE_INDEXES = (
+    "CREATE INDEX objects_number ON objects (number)",
+    "CREATE INDEX pages_pageptr ON pages (pageptr)",
+    "CREATE INDEX pages_object ON pages (object_id, page_order)",
+)
+
+
+class _Column:
+    __slots__ = ("field", "name", "is_list")
+
+    def __init__(self, field, name, is_list):
+        self.field = field
+        self.name = name
+        self.is_list = is_list
+
+    def encode(self, value):
+        if self.is_list and value is not None:
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def decode(self, value):
+        if self.is_list and value is not None:
+            return json.loads(value)
+        return value
+
+
+class _TableWriter:
+    """Inserts rows into a table in batches, adding a column the first time a field is seen."""
+
+    def __init__(self, connection, table, fixed):
+        self.connection = connection
+        self.table = table
+        self.fixed = list(fixed)
+        self.columns = dict()
+        self._rows = []
+        self._statement = None
+
+    def add_column(self, field, is_list):
+        self.flush()
+        column = _Column(field, "c{}".format(len(self.columns)), is_list)
+        self.connection.execute("ALTER TABLE {} ADD COLUMN {}".format(self.table, column.name))
+        self.connection.execute("INSERT INTO columns VALUES (?, ?, ?, ?, ?)",
+                                (self.table, len(self.columns), field, column.name, is_list))
+        self.columns[field] = column
+        self._statement = None
+
+    def insert(self, fixed_values, record):
+        for field, value in record.items():
+            if field not in self.columns:
+                self.add_column(field, isinstance(value, list))
+        row = list(fixed_values)
+        for field, column in self.columns.items():
+            row.append(column.encode(record[field]) if field in record else None)
+        self._rows.append(row)
+        if len(self._rows) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        if self._statement is None:
+            names = self.fixed + [column.name for column in self.columns.values()]
+            self._statement = "INSERT INTO {} ({}) VALUES ({})".format(self.table, ", ".join(names),
+                                                                       ", ".join("?" * len(names)))
+        self.connection.executemany(self._statement, self._rows)
+        self._rows = []
+
+
+def _fetch(cursor):
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+class MetadataDatabase:
+    """A ContentDM TSV or XML export kept in a SQLite file, so that large collections can be read and looked up
+    without holding every record in memory.
+
+    The records are read out of the export one at a time and bulk inserted into an objects table, and pages from a
+    XML export into a pages table. Both are indexed by their CONTENTdm number (cdmid and pageptr). Records are read
+    back out with the same get_record(), iteration and with_fields() as :class:`MigrationTools.cdm_metadata_tsv` and
+    :class:`MigrationTools.cdm_metadata_xml`.
+
+    The database is kept next to the export with the extension ".sqlite". Opening the same export again reuses it
+    without reading the export, unless the export has changed size or modification time since.
+
+    Args:
+        export_file: ContentDM Metadata TSV or XML file name
+        database_file: SQLite file to keep the records in
+        indexes: other fields to index, see :meth:`add_indexes`
+
+    Example::
+
+        metadata = MetadataDatabase("export.xml", indexes=["title"])
+        record = metadata.get_record(155)
+        for record in metadata.with_fields("title", "creator"):
+            print(record)
+
+    """
+
+    def __init__(self, export_file, database_file=None, indexes=()):
+        self.filename = export_file
+        self.database_file = export_file + DATABASE_EXTENSION if database_file is None else database_file
+        ext = os.path.splitext(export_file)[1].lower()
+        if ext == ".tsv":
+            self.reader = cdm_metadata_tsv
+        elif ext == ".xml":
+            self.reader = cdm_metadata_xml
+        else:
+            raise AttributeError("{} is an unsupported file type".format(export_file))
+
+        self._connection = sqlite3.connect(self.database_file)
+        self.ingested = False
+        if self._read_meta() != self._fingerprint():
+            self.ingest()
+            self.ingested = True
+
+        self._columns = {OBJECTS: [], PAGES: []}
+        for table, field, name, is_list in self._connection.execute(
+                "SELECT table_name, field, column_name, is_list FROM columns ORDER BY table_name, position"):
+            self._columns[table].append(_Column(field, name, bool(is_list)))
+        self.schema = Schema(column.field for column in self._columns[OBJECTS])
+        self.rows = int(self._connection.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()[0])
+        self.add_indexes(indexes)
+
+    def close(self):
+        self._connection.close()
+
+    def _fingerprint(self)->dict:
+        stat = os.stat(self.filename)
+        return {
+            "version": str(DATABASE_VERSION),
+            "file": os.path.abspath(self.filename),
+            "size": str(stat.st_size),
+            "mtime": str(stat.st_mtime_ns),
+        }
+
+    def _read_meta(self)->dict:
+        try:
+            meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError:
+            return {}
+        meta.pop("rows", None)
+        return meta
+
+    def ingest(self):
+        """Read the export one record at a time and replace everything in the database with it."""
+        connection = self._connection
+        connection.executescript(_CREATE_TABLES)
+        with connection:
+            objects = _TableWriter(connection, OBJECTS, ["id", "number"])
+            pages = _TableWriter(connection, PAGES, ["object_id", "page_order", "pageptr"])
+            if self.reader is cdm_metadata_tsv:
+                # Keep the columns in the same order as the file
+                for field in cdm_metadata_tsv.read_fields(self.filename):
+                    objects.add_column(field, False)
+
+            rows = 0
+            for object_id, record in enumerate(self.reader.iter_file(self.filename)):
+                number = self.reader.record_number(record)
+                if isinstance(record, Record):
+                    objects.insert((object_id, number), record.data)
+                    for page_order, page in enumerate(record._pages):
+                        pageptr = page.get("pageptr")
+                        pages.insert((object_id, page_order, pageptr[0] if pageptr else None), page)
+                else:
+                    objects.insert((object_id, number), record)
+                rows += 1
+            objects.flush()
+            pages.flush()
+            for statement in _CREATE_INDEXES:
+                connection.execute(statement)
+
+            # Written last so a database that wasn't finished is ingested again the next time it's opened
+            meta = self._fingerprint()
+            meta["rows"] = str(rows)
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+
+    def add_indexes(self, fields):
+        """Index more fields so finding records by them doesn't need to scan every record.
+
+        :param fields: field names of objects or pages
+        """
+        for field in fields:
+            found = False
+            for table, columns in self._columns.items():
+                for column in columns:
+                    if column.field == field:
+                        self._connection.execute("CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})".format(
+                            table, column.name))
+                        found = True
+            if not found:
+                _check_fields(self.schema, [field])
+        self._connection.commit()
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, item):
+        return self._connection.execute("SELECT 1 FROM objects WHERE number = ? LIMIT 1", (str(item),)).fetchone() \
+            is not None
+
+    def has_field(self, metadata_type):
+        return metadata_type in self.schema
+
+    @property
+    def fields(self):
+        return list(self.schema.sorted)
+
+    def _select(self, table, fixed, columns, where="", parameters=()):
+        names = fixed + [column.name for column in columns]
+        order = "id" if table == OBJECTS else "object_id, page_order"
+        cursor = self._connection.cursor()
+        cursor.arraysize = BATCH_SIZE
+        return cursor.execute("SELECT {} FROM {} {} ORDER BY {}".format(", ".join(names), table, where, order),
+                              parameters)
+
+    def _build_object(self, values, columns):
+        if self.reader is cdm_metadata_tsv:
+            record = dict()
+            for column, value in zip(columns, values):
+                # Only rows with more cells than headers have extra cells
+                if value is not None or not column.is_list:
+                    record[column.field] = column.decode(value)
+            return record
+        # Every record has every field, the same as cdm_metadata_xml
+        return Record(defaultdict(list, ((column.field, [] if value is None else column.decode(value))
+                                         for column, value in zip(columns, values))))
+
+    @staticmethod
+    def _build_page(values, columns)->dict:
+        return {column.field: column.decode(value) for column, value in zip(columns, values) if value is not None}
+
+    def _pages(self, where="", parameters=()):
+        columns = self._columns[PAGES]
+        for row in _fetch(self._select(PAGES, ["object_id"], columns, where, parameters)):
+            yield row[0], self._build_page(row[1:], columns)
+
+    def _records(self, where="", parameters=()):
+        columns = self._columns[OBJECTS]
+        rows = _fetch(self._select(OBJECTS, ["id"], columns, where, parameters))
+        if self.reader is cdm_metadata_tsv:
+            for row in rows:
+                yield self._build_object(row[1:], columns)
+            return
+
+        # Both are in object order, so each object's pages are next in the pages cursor
+        pages = self._pages()
+        pending = next(pages, None)
+        for row in rows:
+            object_id = row[0]
+            record = self._build_object(row[1:], columns)
+            while pending is not None and pending[0] < object_id:
+                pending = next(pages, None)
+            while pending is not None and pending[0] == object_id:
+                record.add_page(pending[1])
+                pending = next(pages, None)
+            yield record
+
+    def __iter__(self):
+        return self._records()
+
+    def get_record(self, contentDM_number):
+        """Get a single record from a ContentDM number
+
+        :param contentDM_number: The ContentDM number
+        :returns:   dict -- Single item record
+        """
+        columns = self._columns[OBJECTS]
+        row = self._select(OBJECTS, ["id"], columns, "WHERE number = ?", (str(contentDM_number),)).fetchone()
+        if row is None:
+            raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+        record = self._build_object(row[1:], columns)
+        if isinstance(record, Record):
+            for _, page in self._pages("WHERE object_id = ?", (row[0],)):
+                record.add_page(page)
+        return record
+
+    def get_page(self, pageptr)->dict:
+        """Get a single page of a XML export from its pageptr.
+
+        :param pageptr: The ContentDM number of the page
+        :returns: dict -- the page's fields as lists of values
+        """
+        for _, page in self._pages("WHERE pageptr = ?", (str(pageptr),)):
+            return page
+        raise IndexError("No page for \"{}\" was not found in the metadata".format(pageptr))
+
+    def with_fields(self, *requested_fields):
+        """Generator function that returns all the records with only requested fields. Only the requested columns are
+        read from the database.
+
+        :param requested_fields: fields requested
+        :return: List of records as dictionaries
+        """
+        for field in requested_fields:
+            if not self.has_field(field):
+                raise KeyError
+        by_field = {column.field: column for column in self._columns[OBJECTS]}
+        columns = [by_field[field] for field in requested_fields]
+        for row in _fetch(self._select(OBJECTS, ["id"], columns)):
+            record = self._build_object(row[1:], columns)
+            yield {k: record[k] for k in requested_fields}
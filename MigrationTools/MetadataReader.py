@@ -1,14 +1,29 @@
 import csv
+import functools
 import os
 import warnings
 from abc import abstractmethod
-from collections import namedtuple, defaultdict, MutableMapping
+from collections import namedtuple, defaultdict
+from collections.abc import MutableMapping
 import re
-from xml.etree import ElementTree as ET
 from xml.etree.ElementTree import Element
+
+from . import Instrumentation
+from .ColumnarStorage import ColumnStore, ListRowView
+from .OffsetIndex import TsvOffsetIndex
+from .ParallelXml import iter_records_parallel
+from .Query import RecordQuery
+from .Schema import Schema
+from .XmlBackends import get_backend
+
 Items = namedtuple("collection", ['name', 'files'])
 
-REMOVE_WSPACE_PATTERN = "\n\s*"
+REMOVE_WSPACE_PATTERN = r"\n\s*"
+REMOVE_WSPACE = re.compile(REMOVE_WSPACE_PATTERN)
+
+# Number of different values cleanup_string remembers. Values repeated in every record, like rights statements, stay
+# in it while values that only show up once get pushed out.
+CLEANUP_CACHE_SIZE = 4096
 
 # FullRecord = namedtuple("FullRecord", ["object_level", "item_level"])
 
@@ -18,15 +33,29 @@ class RecordMismatch(Exception):
 
 
 class FullRecord(MutableMapping):
+    """An object with its object level and item level metadata, read as one merged mapping.
+
+    Nothing is merged ahead of time. A field is looked up in additional_info first, then in the pages of item_level
+    from the last page to the first, and then in object_level, so changes made to any of them show up straight away,
+    including a page replaced in item_level or a value changed in place.
+
+    Uses __slots__ to keep each instance small. To pickle many records at once, use
+    :class:`MigrationTools.RecordBatch.RecordBatch`.
+
+    """
+    __slots__ = ("object_level", "_item_level", "additional_info")
+
     def __init__(self, object_level, item_level: list):
         assert isinstance(item_level, list)
         self.object_level = object_level
         self._item_level = item_level
         self.additional_info = dict()
-        self._combined = dict()
+
+    def __reduce__(self):
+        return _restore_full_record, (type(self), self.object_level, self._item_level, self.additional_info)
 
     def __iter__(self):
-        return self._combined_dict().__iter__()
+        return iter(self._keys())
 
     def __delitem__(self, key):
         return self.additional_info.__delitem__(key)
@@ -35,17 +64,29 @@ class FullRecord(MutableMapping):
         self.additional_info[key] = value
 
     def __getitem__(self, key):
-        result = self._combined_dict().__getitem__(key)
+        if key in self.additional_info:
+            result = self.additional_info[key]
+        else:
+            for page in reversed(self._item_level):
+                if key in page:
+                    return ";".join(page[key])
+            if key not in self.object_level:
+                raise KeyError(key)
+            result = self.object_level[key]
         if isinstance(result, list):
             return ";".join(result)
         return result
 
+    def __contains__(self, key):
+        return key in self.additional_info or any(key in page for page in self._item_level) \
+            or key in self.object_level
+
     def __len__(self):
         # if self.item_level is not None and len(self.item_level) > 0:
         #     return len(self.item_level)
         # else:
         #     return 1
-        return len(self._combined_dict())
+        return len(self._keys())
 
     @property
     def item_level(self):
@@ -60,29 +101,13 @@ class FullRecord(MutableMapping):
     def __str__(self):
         return str({'object_level': str(self.object_level), 'item_level': str(self.item_level)})
 
-    def _combined_dict(self):
-        if self.item_level is not None and len(self._item_level) > 0:
-            # FIXME: something missing for getting a dictionary
-            combined = self._flatten(self._item_level)
-
-            # combined_items = defaultdict(str)
-            # for item in self.item_level:
-
-                # for key, value in item.data:
-                #     combined_items[key] = combined_items[key]
-                # combined_items[item]
-            # return {**self.object_level, **self.additional_info}
-            # self._combined = {**self.object_level, **combined, **self.additional_info}
-
-            return {**self.object_level, **combined, **self.additional_info}
-        else:
-            # self._combined = {**self.object_level, **self.additional_info}
-            return {**self.object_level, **self.additional_info}
-
-    def _flatten(self, full_list):
-        combined = {k: v for d in full_list for k, v in d.items()}
-        combined = {k: ";".join(v) for k, v in combined.items()}
-        return combined
+    def _keys(self)->dict:
+        # Same order as merging object_level, the pages and additional_info into a dict
+        keys = dict.fromkeys(self.object_level)
+        for page in self._item_level:
+            keys.update(dict.fromkeys(page))
+        keys.update(dict.fromkeys(self.additional_info))
+        return keys
 
     def __repr__(self):
         object_level = 'object_level : {}\n'.format(self.object_level)
@@ -107,9 +132,44 @@ class FullRecord(MutableMapping):
         return fields
 
 class _CDM_md_base:
-    def __init__(self, filename):
+    KEY_FIELD = None
+
+    def __init__(self, filename, cache=None, columnar=False, fields=None):
         self.filename = filename
-        self._fields, self.records = self.load_data(filename)
+        self.columnar = columnar
+        self.selected_fields = self.select_fields(fields)
+        load_data = functools.partial(self.load_columnar if columnar else self.load_data, **self.load_options())
+        with Instrumentation.phase(type(self).__name__ + ".load"):
+            if cache is not None:
+                namespace = type(self).__name__ + (".columnar" if columnar else "")
+                if self.selected_fields is not None:
+                    namespace += "." + "\0".join(self.selected_fields)
+                fields, self.records = cache.load(filename, load_data, namespace=namespace)
+            else:
+                fields, self.records = load_data(filename)
+        Instrumentation.count(type(self).__name__ + ".records", len(self.records))
+        self.schema = Schema(fields)
+        self._index = self.build_index(self.records)
+        self._query = None
+
+    def load_options(self)->dict:
+        """Keyword arguments given to load_data() or load_columnar() when loading the file."""
+        return {"fields": self.selected_fields}
+
+    @classmethod
+    def select_fields(cls, fields)->list:
+        """Get the fields to load when only some fields are requested. The field used to look up records is always
+        included.
+
+        :param fields: requested fields or None for everything
+        :returns: list -- the fields to load or None for everything
+        """
+        if fields is None:
+            return None
+        selected = list(fields)
+        if cls.KEY_FIELD not in selected:
+            selected.append(cls.KEY_FIELD)
+        return selected
 
     def __iter__(self):
         return iter(self.records)
@@ -118,15 +178,66 @@ class _CDM_md_base:
         return len(self.records)
 
     def __contains__(self, item):
-        for record in self.records:
-            if record['CONTENTdm number'] == str(item):
-                return True
-        return False
+        return str(item) in self._index
 
     @abstractmethod
     def get_record(self, contentDM_number):
         pass
 
+    @staticmethod
+    @abstractmethod
+    def record_number(record):
+        """Get the CONTENTdm number of a record as a string or None if the record doesn't have one."""
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def record_fields(record):
+        """Get the field names of a record."""
+        pass
+
+    def build_index(self, records)->dict:
+        """Map the CONTENTdm number of every record to the record so lookups don't have to scan the records.
+
+        If more than one record has the same CONTENTdm number, the first one wins, the same as scanning the records in
+        order would.
+
+        :param records: records to index
+        :returns: dict -- CONTENTdm number as a string to record
+        """
+        index = dict()
+        for record in records:
+            number = self.record_number(record)
+            if number is not None:
+                index.setdefault(number, record)
+        return index
+
+    def add_record(self, record):
+        """Append a record and keep the CONTENTdm number index up to date.
+
+        .. Note::
+
+            Append to records through this method instead of to records directly, otherwise get_record() and the
+            in operator won't be able to find the new record.
+
+        :param record: record to add
+        """
+        self.records.append(record)
+        # Columnar storage keeps its own copy of the record
+        record = self.records[-1]
+        number = self.record_number(record)
+        if number is not None:
+            self._index.setdefault(number, record)
+        self.schema.update(self.record_fields(record))
+        if self._query is not None:
+            self._query.added()
+
+    def _lookup(self, contentDM_number):
+        try:
+            return self._index[str(contentDM_number)]
+        except KeyError:
+            raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+
     def __str__(self):
         return str("{}: \"{}\"".format(type(self), self.filename))
 
@@ -177,17 +288,38 @@ class _CDM_md_base:
             However if you ask for "CONTENTdm file name", you recieve True back.
 
         """
-        try:
-            assert self.records[0][metadata_type] is not None
-            return True
-        except KeyError:
-            return False
+        return metadata_type in self.schema
 
     @property
     def columns(self):
         warnings.warn("Use fields() instead", DeprecationWarning)
         return self.fields
 
+    def where(self, conditions: dict=None, **fields)->list:
+        """Find the records where every field matches its condition.
+
+        A condition is a value that the field must be equal to, or one of :class:`MigrationTools.Query.Prefix`,
+        :class:`MigrationTools.Query.Regex` or :class:`MigrationTools.Query.AnyValue` for fields with more than one
+        value separated by ";". The first query of a field makes an index of it that is reused by the next queries, so
+        they don't have to read through every record.
+
+        :param conditions: field name to condition, for field names that can't be keyword arguments
+        :param fields: field name to condition
+        :returns: list -- the matching records, in the same order as the metadata
+
+        For example::
+
+            my_metadata = cdm_metadata_tsv("tests/test.tsv")
+            my_metadata.where(Type="Maps")
+            my_metadata.where({"CONTENTdm file name": Prefix("10")}, Subject=AnyValue("Africa"))
+
+        """
+        conditions = dict(conditions or {}, **fields)
+        _check_fields(self.schema, conditions)
+        if self._query is None:
+            self._query = RecordQuery(self.records if self.records is not None else self)
+        return self._query.where(conditions)
+
     def with_fields(self, *requested_fields):
         """Generator function that returns all the records with only requested fields
 
@@ -207,7 +339,10 @@ class _CDM_md_base:
                 raise KeyError
 
 
-        for record in self.records:
+        yield from self._project(requested_fields)
+
+    def _project(self, requested_fields):
+        for record in self:
             yield {k: record[k] for k in (requested_fields)}
 
     @property
@@ -228,12 +363,18 @@ class _CDM_md_base:
 
         """
 
-        return sorted(self._fields)
+        return list(self.schema.sorted)
         # return keys
 
     @staticmethod
     @abstractmethod
-    def load_data(tsv_file)->list:
+    def load_data(tsv_file, fields=None)->list:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def load_columnar(filename, fields=None)->list:
+        """Same as load_data() but the records are kept in a :class:`MigrationTools.ColumnarStorage.ColumnStore`."""
         pass
 
 class cdm_metadata_tsv(_CDM_md_base):
@@ -242,38 +383,197 @@ class cdm_metadata_tsv(_CDM_md_base):
 
     Args:
       tsv_file: ContentDM Metadata TSV file name
+      stream: Don't load the records into memory. Iterating reads the rows straight from the file instead, so memory
+        use stays the same no matter how big the file is. Looking up a record by its CONTENTdm number has to read
+        through the file.
+      random_access: Don't load the records into memory. Instead, find where each row starts in the file so that
+        get_record() only has to read the one row it needs. See :class:`MigrationTools.OffsetIndex.TsvOffsetIndex`.
+      cache: :class:`MigrationTools.MetadataCache.MetadataCache` to reuse the parsed records from if the file hasn't
+        changed since it was last opened. Not used with stream or random_access.
+      columnar: Store the records by column with repeated values shared between records to use a lot less memory.
+        Records are returned as read-only mappings instead of dicts.
+      fields: Only read these columns and skip the rest. "CONTENTdm number" is always read so that records can still
+        be looked up. Raises a KeyError if a column isn't in the file.
 
     **NOTE: The tsv file must be encoded as utf-8 to work properly!**
 
     Example:
 
         >>> my_metadata = cdm_metadata_tsv("tests/test.tsv")
+        >>> big_metadata = cdm_metadata_tsv("tests/test.tsv", stream=True)
+        >>> titles = cdm_metadata_tsv("tests/test.tsv", fields=["Title"])
 
 
     """
+    KEY_FIELD = 'CONTENTdm number'
+
+    def __init__(self, tsv_file, stream=False, random_access=False, cache=None, columnar=False, fields=None):
+        if stream + random_access + columnar > 1:
+            raise ValueError("Only one of stream, random_access or columnar can be used")
+        self.stream = stream
+        self.random_access = random_access
+        self._offsets = None
+        if stream or random_access:
+            self.filename = tsv_file
+            self.selected_fields = self.select_fields(fields)
+            self.records = None
+            self._index = None
+            if stream:
+                fields = self.read_fields(tsv_file)
+            else:
+                self._offsets = TsvOffsetIndex(tsv_file)
+                fields = self._offsets.fields
+            if self.selected_fields is not None:
+                _check_fields(fields, self.selected_fields)
+                fields = self.selected_fields
+            self.schema = Schema(fields)
+            self._query = None
+        else:
+            super().__init__(tsv_file, cache=cache, columnar=columnar, fields=fields)
+
+    def __iter__(self):
+        if self.records is None:
+            return self.iter_file(self.filename, self.selected_fields)
+        return super().__iter__()
+
+    def __len__(self):
+        if self.random_access:
+            return len(self._offsets)
+        if self.stream:
+            return sum(1 for _ in self.iter_file(self.filename, [self.KEY_FIELD]))
+        return super().__len__()
+
+    def __contains__(self, item):
+        if self.random_access:
+            return item in self._offsets
+        if self.stream:
+            return self._scan(item) is not None
+        return super().__contains__(item)
 
     @staticmethod
-    def load_data(tsv_file)->list:
+    def load_data(tsv_file, fields=None)->list:
         records = []
         with open(tsv_file, 'r', encoding="utf-8") as f:
 
-            data = csv.DictReader(f, dialect="excel-tab")
+            data = read_tsv_rows(f, fields)
             for row in data:
                 records.append(row)
 
-        fields = records[0].keys()
+        fields = list(records[0].keys())
         return fields, records
 
+    @staticmethod
+    def load_columnar(tsv_file, fields=None)->list:
+        with open(tsv_file, 'r', encoding="utf-8") as f:
+            if fields is None:
+                data = csv.DictReader(f, dialect="excel-tab")
+                records = ColumnStore(data.fieldnames)
+            else:
+                data = read_tsv_rows(f, fields)
+                records = ColumnStore(fields)
+            for row in data:
+                records.append(row)
+        return list(records.fields), records
+
+    @staticmethod
+    def read_fields(tsv_file)->list:
+        """Read only the header of a TSV file.
+
+        :param tsv_file: ContentDM Metadata TSV file name
+        :returns: list -- column headers in the order they are found in the file
+        """
+        with open(tsv_file, 'r', encoding="utf-8") as f:
+            return csv.DictReader(f, dialect="excel-tab").fieldnames
+
+    @classmethod
+    def iter_file(cls, tsv_file, fields=None):
+        """Generator function that yields the rows of a TSV file one at a time without keeping them in memory.
+
+        :param tsv_file: ContentDM Metadata TSV file name
+        :param fields: only include these columns
+        :yields: dict -- a single row
+
+        For example::
+
+            for record in cdm_metadata_tsv.iter_file("tests/test.tsv"):
+                print(record['Title'])
+
+        """
+        with open(tsv_file, 'r', encoding="utf-8") as f:
+            for row in read_tsv_rows(f, fields):
+                yield row
+
+    def _project(self, requested_fields):
+        if self.stream:
+            # Only build dictionaries of the requested cells while reading the file
+            return self.iter_file(self.filename, requested_fields)
+        return super()._project(requested_fields)
+
+    def _scan(self, contentDM_number):
+        number = str(contentDM_number)
+        for record in self.iter_file(self.filename, self.selected_fields):
+            if self.record_number(record) == number:
+                return record
+        return None
+
+    @staticmethod
+    def record_number(record):
+        return record.get(cdm_metadata_tsv.KEY_FIELD)
+
+    @staticmethod
+    def record_fields(record):
+        return record.keys()
+
     def get_record(self, contentDM_number):
         """Get a single record from a ContentDM number
 
         :param contentDM_number: The ContentDM number
         :returns:   dict -- Single item record
         """
-        for record in self.records:
-            if record['CONTENTdm number'] == str(contentDM_number):
-                return record
-        raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+        if self.random_access:
+            record = self._offsets.get_record(contentDM_number)
+            if self.selected_fields is not None:
+                record = {field: record[field] for field in self.selected_fields}
+            return record
+        if self.stream:
+            record = self._scan(contentDM_number)
+            if record is None:
+                raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+            return record
+        return self._lookup(contentDM_number)
+
+
+def _check_fields(available, requested):
+    missing = [field for field in requested if field not in available]
+    if missing:
+        raise KeyError("Fields not found: {}".format(", ".join(missing)))
+
+
+def read_tsv_rows(f, fields=None):
+    """Generator function that reads the rows from an open TSV file as dictionaries.
+
+    If fields are given, only those cells are kept. The other cells in a row are never put into a dictionary.
+
+    :param f: open file object
+    :param fields: columns to include or None for all of them
+    :yields: dict -- a single row
+    """
+    if fields is None:
+        yield from csv.DictReader(f, dialect="excel-tab")
+        return
+
+    reader = csv.reader(f, dialect="excel-tab")
+    header = next(reader, [])
+    columns = {field: column for column, field in enumerate(header)}
+    _check_fields(columns, fields)
+    selected = [(field, columns[field]) for field in fields]
+    width = len(header)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row += [None] * (width - len(row))
+        yield {field: row[column] for field, column in selected}
 
 
 def has_children(element: Element):
@@ -297,51 +597,233 @@ def build_branch(branch: str, element: Element)->dict:
 
 
 def cleanup_string(text: str):
-    p = re.compile(REMOVE_WSPACE_PATTERN)
-    return p.sub(" ", text).strip()
+    """Join the lines of an element's text into one line and strip the whitespace around it.
+
+    Results are remembered for the most recently used values, so a value repeated in many records is only cleaned once
+    and the records share one copy of it.
+    """
+    if Instrumentation.enabled:
+        with Instrumentation.phase("cleanup_string", memory=False):
+            return _cleanup_string(text)
+    return _cleanup_string(text)
+
+
+@functools.lru_cache(maxsize=CLEANUP_CACHE_SIZE)
+def _cleanup_string(text: str):
+    if "\n" in text:
+        text = REMOVE_WSPACE.sub(" ", text)
+    # Not interned, because interned strings are never freed on some versions of Python and most values only show up
+    # once. Sharing is left to the cache, which is bounded.
+    return text.strip()
 
 
 class cdm_metadata_xml(_CDM_md_base):
+    """Use for reading the data found in an ContentDM exported XML file.
+
+    Args:
+      xml_file: ContentDM Metadata XML file name
+      cache: :class:`MigrationTools.MetadataCache.MetadataCache` to reuse the parsed records from if the file hasn't
+        changed since it was last opened.
+      columnar: Store the records by column with repeated values shared between records to use less memory.
+      fields: Only keep these elements for each record and page and skip the rest. "cdmid" is always kept for records
+        and "pagetitle" and "pageptr" for pages. Raises a KeyError if an element isn't in the file.
+      workers: Number of processes used to parse the file. With more than one, the file is split into parts at record
+        boundaries and the parts are parsed at the same time. See
+        :func:`MigrationTools.ParallelXml.iter_records_parallel`. None uses one process per CPU.
+      backend: Name of the parser to use, "lxml" or "etree". None uses lxml if it's installed. See
+        :mod:`MigrationTools.XmlBackends`.
+
+    """
+    KEY_FIELD = 'cdmid'
+
+    def __init__(self, xml_file, cache=None, columnar=False, fields=None, workers=1, backend=None):
+        self.workers = workers
+        self.backend = get_backend(backend).name
+        super().__init__(xml_file, cache=cache, columnar=columnar, fields=fields)
+
+    def load_options(self)->dict:
+        options = super().load_options()
+        options["workers"] = self.workers
+        options["backend"] = self.backend
+        return options
 
     def fields(self):
-        return sorted(self._fields)
+        return list(self.schema.sorted)
 
     @staticmethod
-    def load_data(xml_file)->list:
-        tree = ET.parse(xml_file)
+    def load_data(xml_file, fields=None, workers=1, backend=None)->list:
         records = []
-        fieldnames = cdm_metadata_xml.get_field_names(tree.getroot())
+        fieldnames = set()
+
+        for record in cdm_metadata_xml._parse(xml_file, fields, fieldnames, workers, backend):
+            records.append(record)
+
+        if fields is not None:
+            _check_fields(fieldnames, fields)
+            fieldnames = set(fields)
+
+        # Every record has every field, even if the element wasn't in that record
+        for record in records:
+            for name in fieldnames:
+                if name not in record.data:
+                    record.data[name] = []
+        return fieldnames, records
 
-        for record in tree.getroot():
-            records.append(cdm_metadata_xml.build_record(record, fieldnames))
+    @staticmethod
+    def load_columnar(xml_file, fields=None, workers=1, backend=None)->list:
+        records = []
+        fieldnames = set()
+        store = ColumnStore([] if fields is None else fields, default=(), view=ListRowView)
+        page_values = dict()
+
+        for record in cdm_metadata_xml._parse(xml_file, fields, fieldnames, workers, backend):
+            columnar_record = Record(store.append(record.data))
+            for page in record._pages:
+                columnar_record.add_page(
+                    {key: [page_values.setdefault(value, value) for value in values] for key, values in page.items()})
+            records.append(columnar_record)
+
+        if fields is not None:
+            _check_fields(fieldnames, fields)
+            fieldnames = set(fields)
         return fieldnames, records
 
     @staticmethod
-    def build_record(xml_element_record: Element, field_names)->defaultdict(list):
+    def _parse(xml_file, fields, found_fields, workers, backend):
+        if workers is None or workers > 1:
+            return iter_records_parallel(xml_file, workers, fields, found_fields, backend)
+        return cdm_metadata_xml.iter_records(xml_file, fields, found_fields, backend)
+
+    @staticmethod
+    def iter_records(xml_file, fields=None, found_fields=None, backend=None):
+        """Generator function that reads the records of a XML file one at a time in a single pass.
+
+        Each record is built as soon as its closing tag is read and then removed from the element tree, so only one
+        record is kept in memory at a time.
+
+        :param xml_file: ContentDM Metadata XML file name
+        :param fields: only keep the elements with these names. None keeps everything.
+        :param found_fields: set to add the name of every element found directly in a record to, including the ones
+            skipped because of fields
+        :param backend: name of the parser to use. None uses lxml if it's installed.
+        :yields: Record -- with a field for every element found in that record
+        """
+        backend = get_backend(backend)
+        if fields is not None:
+            fields = set(fields)
+        for element in cdm_metadata_xml._iter_record_elements(xml_file, backend):
+            field_names = {child.tag for child in element}
+            if found_fields is not None:
+                found_fields.update(field_names)
+            if fields is not None:
+                field_names.intersection_update(fields)
+            with Instrumentation.phase("cdm_metadata_xml.build_record", memory=False):
+                record = cdm_metadata_xml.build_record(element, field_names, fields=fields, backend=backend)
+            Instrumentation.count("cdm_metadata_xml.pages", record.page_count)
+            yield record
+
+    @staticmethod
+    def _iter_record_elements(xml_file, backend=None):
+        # Yields each top level record element once it has been read completely. The element is removed from the tree
+        # as soon as the next one is asked for.
+        depth = 0
+        root = None
+        for event, element in get_backend(backend).iterparse(xml_file):
+            if event == "start":
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            yield element
+            root.clear()
+
+    @staticmethod
+    def count_parts(xml_file, backend=None)->tuple:
+        """Count the records and pages of a XML file without building the records.
+
+        :param xml_file: ContentDM Metadata XML file name
+        :param backend: name of the parser to use. None uses lxml if it's installed.
+        :returns: tuple -- number of records and number of pages
+        """
+        backend = get_backend(backend)
+        records = 0
+        pages = 0
+        for element in cdm_metadata_xml._iter_record_elements(xml_file, backend):
+            records += 1
+            pages += len(backend.find_pages(element))
+        return records, pages
+
+    @classmethod
+    def iter_file(cls, xml_file, fields=None, backend=None):
+        """Generator function that yields the records of a XML file one at a time without keeping them in memory.
+
+        Because the file is only read once, a record only has the fields found in it. Reading a field that isn't in
+        the record gives None, the same as for an empty field.
+
+        :param xml_file: ContentDM Metadata XML file name
+        :param fields: only keep the elements with these names
+        :param backend: name of the parser to use. None uses lxml if it's installed.
+        :yields: Record -- a single record with its pages
+
+        For example::
+
+            for record in cdm_metadata_xml.iter_file("tests/export.xml"):
+                print(record['title'])
+
+        """
+        yield from cls.iter_records(xml_file, fields, backend=backend)
+
+    @staticmethod
+    def build_record(xml_element_record: Element, field_names, fields=None, backend=None)->defaultdict(list):
+        """Build a Record from a record element.
+
+        :param xml_element_record: record element
+        :param field_names: every field name that a record can have
+        :param fields: only keep the elements with these names, for the record and its pages. None keeps everything.
+        :param backend: parser backend that made the element, used to find its pages. None works with any element.
+        :returns: Record
+        """
         metadata = defaultdict(list, {key: [] for key in field_names})
 
         for element in xml_element_record:
-            if element.text is not None:
-                metadata[element.tag].append(cleanup_string(element.text))
+            # lxml makes a new string every time text is read, so it's only read once
+            text = element.text
+            if text is not None and (fields is None or element.tag in fields):
+                metadata[element.tag].append(cleanup_string(text))
 
 
-        pages_records = xml_element_record.findall("structure/page")
-        if len(pages_records) == 0:
-            pages_records = xml_element_record.findall("structure/node/page")
         new_record = Record(metadata)
-        for page in pages_records:
-            new_record.add_page(cdm_metadata_xml.build_page_metadata(page))
+        pages = cdm_metadata_xml.find_pages(xml_element_record) if backend is None else \
+            backend.find_pages(xml_element_record)
+        for page in pages:
+            new_record.add_page(cdm_metadata_xml.build_page_metadata(page, fields))
 
         return new_record
 
     @staticmethod
-    def build_page_metadata(page: Element)->dict:
+    def find_pages(xml_element_record: Element)->list:
+        """Get the page elements of a record element."""
+        pages_records = xml_element_record.findall("structure/page")
+        if len(pages_records) == 0:
+            pages_records = xml_element_record.findall("structure/node/page")
+        return pages_records
+
+    @staticmethod
+    def build_page_metadata(page: Element, fields=None)->dict:
         new_page = defaultdict(list)
         # new_page[]
         foo = page.find("pagemetadata")
         for x in foo.iter():
-            if x.text is not None and x.text.strip():
-                new_page[x.tag].append(cleanup_string(x.text))
+            if fields is not None and x.tag not in fields:
+                continue
+            text = x.text
+            if text is not None and text.strip():
+                new_page[x.tag].append(cleanup_string(text))
         new_page['pagetitle'].append(page.find("pagetitle").text)
         new_page['pageptr'].append(page.find("pageptr").text)
 
@@ -356,7 +838,7 @@ class cdm_metadata_xml(_CDM_md_base):
         return field_names
 
     def has_field(self, metadata_type):
-        return metadata_type in self.fields()
+        return metadata_type in self.schema
 
     def get_record(self, contentDM_number):
         """Get a single record from a ContentDM number
@@ -364,15 +846,29 @@ class cdm_metadata_xml(_CDM_md_base):
         :param contentDM_number: The ContentDM number
         :returns:   dict -- Single item record
         """
+        return self._lookup(contentDM_number)
 
-        for record in self.records:
-            if record.data['cdmid'][0] == str(contentDM_number):
-                return record
-        raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+    @staticmethod
+    def record_number(record):
+        numbers = record.data.get(cdm_metadata_xml.KEY_FIELD)
+        if numbers:
+            return numbers[0]
+        return None
+
+    @staticmethod
+    def record_fields(record):
+        return record.data.keys()
 
     def __iter__(self):
         return iter(self.records)
 
+    def part_count(self)->int:
+        """Count the records and their pages without copying them. Same as the number of items yielded by parts().
+
+        :returns: int -- number of records plus the number of pages
+        """
+        return sum(1 + record.page_count for record in self)
+
     def parts(self):
         """Yields records that are broken down into a single part. Meaning, the object level and the item level are returned
         separately.
@@ -402,9 +898,24 @@ def CDM_Metadata_factory(filename):
 
 
 class Record(MutableMapping):
+    """A single record from a xml export with its pages.
+
+    The merged view of the record and its pages is built whenever it's iterated over, so changes to data show up
+    straight away. The copies returned by pages are made the first time they are needed and reused until a page is
+    added.
+
+    Uses __slots__ to keep each instance small, and the page copies are left out when pickled. To pickle many records
+    at once, use :class:`MigrationTools.RecordBatch.RecordBatch`.
+    """
+    __slots__ = ("data", "_pages", "_page_copies")
+
     def __init__(self, data: dict):
         self.data = data
         self._pages = []
+        self._page_copies = None
+
+    def __reduce__(self):
+        return _restore_record, (type(self), self.data, self._pages)
 
     def __str__(self):
         return str(self._combined_dict())
@@ -423,6 +934,10 @@ class Record(MutableMapping):
     def __iter__(self):
         return self._combined_dict().__iter__()
 
+    def __contains__(self, item):
+        # Without this, Mapping would read the field, which adds it if data is a defaultdict
+        return item in self.data or any(item in page for page in self._pages)
+
     def __delitem__(self, key):
         raise NotImplementedError("Unable to delete this information")
 
@@ -430,7 +945,7 @@ class Record(MutableMapping):
         raise NotImplementedError("Unable to modify this information")
 
     def _combined_dict(self):
-        combined = {k: v for d in self.pages for k, v in d.items()}
+        combined = {k: v for d in self._pages for k, v in d.items()}
         everything = {**self.data, **combined}
         return everything
 
@@ -456,6 +971,7 @@ class Record(MutableMapping):
 
     def add_page(self, page):
         self._pages.append(page)
+        self._page_copies = None
 
     @property
     def fields(self):
@@ -469,7 +985,117 @@ class Record(MutableMapping):
 
     @property
     def pages(self):
-        return [dict(x) for x in self._pages]
+        """Copies of the pages of the record.
+
+        The copies are made once and shared by every call until a page is added, so treat them as read-only.
+        """
+        if self._page_copies is None:
+            self._page_copies = [dict(x) for x in self._pages]
+        return list(self._page_copies)
+
+    @property
+    def page_count(self)->int:
+        return len(self._pages)
+
+
+def _restore_record(cls, data, pages):
+    record = cls(data)
+    record._pages = pages
+    return record
+
+
+def _restore_full_record(cls, object_level, item_level, additional_info):
+    record = cls(object_level, item_level)
+    record.additional_info = additional_info
+    return record
+
+
+class PageView(MutableMapping):
+    """A single page of an object, read as one mapping of the object's fields, the page's own fields and the page's
+    row from the tsv export.
+
+    Nothing is copied when the view is made. The object level fields are shared by every page of the object, and a
+    page's values are only joined into a string when they are read. Setting or deleting a field only changes the view,
+    never the object, the page or the tsv row underneath it.
+
+    A field is looked up in the fields set on the view first, then the tsv row, then the page and then the object.
+
+    .. Note::
+
+        Changes made to the page or to the tsv row after the view is made show up in the view. Use copy() to keep a
+        page as it is.
+
+    Args:
+        object_level: fields of the object the page belongs to
+        page: the page's own fields, as lists of values
+        row: the page's row from the tsv export
+        own: fields set on this view only
+
+    """
+    __slots__ = ("_object_level", "_page", "_row", "_own", "_deleted")
+
+    def __init__(self, object_level, page, row=None, own=None):
+        self._object_level = object_level
+        self._page = page
+        self._row = {} if row is None else row
+        self._own = {} if own is None else own
+        self._deleted = None
+
+    def __getitem__(self, key):
+        if self._deleted is not None and key in self._deleted:
+            raise KeyError(key)
+        if key in self._own:
+            return self._own[key]
+        if key in self._row:
+            return self._row[key]
+        if key in self._page:
+            return ";".join(self._page[key])
+        if key in self._object_level:
+            return self._object_level[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if self._deleted is not None and key in self._deleted:
+            return False
+        return key in self._own or key in self._row or key in self._page or key in self._object_level
+
+    def __setitem__(self, key, value):
+        self._own[key] = value
+        if self._deleted is not None:
+            self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._own.pop(key, None)
+        if self._deleted is None:
+            self._deleted = set()
+        self._deleted.add(key)
+
+    def _keys(self)->dict:
+        # Same order as merging the object, page, row and own fields into a dict, except that the page's fields
+        # replace the object's fields in the page's position instead of the object's
+        page = self._page
+        keys = dict.fromkeys(key for key in self._object_level if key not in page)
+        keys.update(dict.fromkeys(page))
+        keys.update(dict.fromkeys(self._row))
+        keys.update(dict.fromkeys(self._own))
+        if self._deleted:
+            for key in self._deleted:
+                keys.pop(key, None)
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self)->dict:
+        return dict(self)
 
 
 class CDM_Metadata:
@@ -485,8 +1111,33 @@ class CDM_Metadata:
        files exported from CONTENTdm are saved with the .txt extension. As a workaround, change the extension of these
        files from .txt to .tsv.
 
+    Args:
+        files: a xml file, a tsv file or one of each
+        cache: :class:`MigrationTools.MetadataCache.MetadataCache` to reuse the parsed files from if they haven't
+          changed since they were last opened
+        columnar: store the parsed files by column to use less memory
+        lazy: don't build the full records until they are iterated over. The xml file is read one record at a time
+          while iterating and a tsv file on its own is streamed, so the first records are available right away and
+          stopping early skips the rest of the work. When both files are given, the tsv file is still loaded so the
+          records can be joined, and the check that both files have the same number of records happens once
+          iteration reaches the end. So where the eager join raises RecordMismatch for a xml record or page that
+          isn't in the tsv file, lazy iteration raises IndexError when it reaches that part. With only a xml file, each object only has the fields found in its own record,
+          because the fields of the records after it haven't been read yet. When not lazy, an object also has every
+          other record's fields, set to None.
+        memory_budget: most bytes of memory the process should use while joining a xml and a tsv file, including what
+          it already uses. If joining them in memory would go over, they are joined through temporary files instead,
+          one partition at a time, see :func:`MigrationTools.SpillJoin.iter_spilled_join`. The records are then built
+          while they are iterated over, the same as when lazy. None always joins in memory.
+        temp_dir: directory for the temporary files of a join that doesn't fit in the memory budget
+        merge_join: join a xml and a tsv file that list their records in the same order by reading both in step while
+          iterating, keeping only one object in memory at a time. If the order turns out to be different, or the
+          CONTENTdm numbers don't go up from one object to the next, the rest is joined with a hash table of the tsv
+          file instead. See :func:`MigrationTools.MergeJoin.iter_merge_join`.
+          Implies lazy and is used instead of a memory budget.
+
     """
-    def __init__(self, *files):
+    def __init__(self, *files, cache=None, columnar=False, lazy=False, memory_budget=None, temp_dir=None,
+                 merge_join=False):
         tsv_file = None
         xml_file = None
 
@@ -507,80 +1158,293 @@ class CDM_Metadata:
             else:
                 raise AttributeError("{} is an unsupported file type".format(file))
 
+        self.tsv_file = tsv_file
+        self.xml_file = xml_file
+        self.spill_partitions = None
+        self.temp_dir = temp_dir
+        self.merge_join = merge_join and tsv_file is not None and xml_file is not None
+        if self.merge_join:
+            lazy = True
+        elif memory_budget is not None and tsv_file is not None and xml_file is not None:
+            from .SpillJoin import available_memory, estimate_memory, partitions_for
+            available = available_memory(memory_budget)
+            if estimate_memory(xml_file, tsv_file) > available:
+                self.spill_partitions = partitions_for(tsv_file, available)
+                lazy = True
+        self.lazy = lazy
+        self._data = None
+        self._schema = None
+        self._object_count = None
+        self._page_count = None
+        self._query = None
+
         if tsv_file is not None:
-            self.tsv_metadata = cdm_metadata_tsv(tsv_file)
+            if (lazy and xml_file is None) or self.spill_partitions is not None or self.merge_join:
+                self.tsv_metadata = cdm_metadata_tsv(tsv_file, stream=True)
+            else:
+                self.tsv_metadata = cdm_metadata_tsv(tsv_file, cache=cache, columnar=columnar)
         else:
             self.tsv_metadata = None
 
-        if xml_file is not None:
-            self.xml_metadata = cdm_metadata_xml(xml_file)
+        if xml_file is not None and not lazy:
+            self.xml_metadata = cdm_metadata_xml(xml_file, cache=cache, columnar=columnar)
         else:
             self.xml_metadata = None
 
-        # join if both Xml and TSV are given
-        if self.tsv_metadata is not None and self.xml_metadata is not None:
-            self._data = CDM_Metadata.create_full(xml_metadata=self.xml_metadata, tsv_metadata=self.tsv_metadata)
+        # Only needed to join the xml records, so a tsv file on its own isn't read into a hash table
+        if self.tsv_metadata is not None and xml_file is not None and self.spill_partitions is None \
+                and not self.merge_join:
+            self._lookup = CDM_Metadata.tsv_lookup(self.tsv_metadata)
+        else:
+            self._lookup = None
 
-        # if only a tsv file is given, Full record with only the object level data and nothing for the page/item level
-        elif self.tsv_metadata is not None:
-            self._data = CDM_Metadata.create_full(tsv_metadata=self.tsv_metadata)
+        if tsv_file is None and xml_file is None:
+            raise AttributeError("Need a valid xml, tsv or both")
+        if lazy:
+            return
+
+        with Instrumentation.phase("CDM_Metadata.join"):
+            # join if both Xml and TSV are given
+            if self.tsv_metadata is not None and self.xml_metadata is not None:
+                self._data = CDM_Metadata.create_full(xml_metadata=self.xml_metadata,
+                                                      tsv_metadata=self.tsv_metadata, lookup=self._lookup)
+
+            # if only a tsv file is given, Full record with only the object level data and nothing for the
+            # page/item level
+            elif self.tsv_metadata is not None:
+                self._data = CDM_Metadata.create_full(tsv_metadata=self.tsv_metadata)
+
+            # if only a xml file is given, use only that data
+            elif self.xml_metadata is not None:
+                self._data = CDM_Metadata.create_full(xml_metadata=self.xml_metadata)
+            else:
+                raise AttributeError("Need a valid xml, tsv or both")
 
+        self._schema = self._find_schema(self._data)
+        self._object_count = len(self._data)
+        self._page_count = sum(len(record.item_level) for record in self._data)
 
-        # if only a xml file is given, use only that data
-        elif self.xml_metadata is not None:
-            self._data = CDM_Metadata.create_full(xml_metadata=self.xml_metadata)
-        else:
-            raise AttributeError("Need a valid xml, tsv or both")
-        pass
+    @staticmethod
+    def _find_schema(full_records)->Schema:
+        schema = Schema(['group_id'])
+        for record in full_records:
+            schema.update(record.fields)
+            schema.update(record.additional_info)
+        return schema
 
     @property
-    def fields(self):
-        all_fields = set()
-        all_fields.add('group_id')
+    def schema_snapshot(self)->Schema:
+        """The fields of every record as they were when the fields were first found, reused by fields and has_field.
+
+        The fields of each record's object level, pages and additional_info are all included. When not lazy, the
+        fields are found while the records are joined. When lazy, the records are read through once the first time the
+        fields are needed.
 
-        for record in self._data:
-            all_fields.update(record.fields)
-        return list(all_fields)
+        .. Note::
+
+            Fields added to the records afterwards, through additional_info, __setitem__ or object_level, aren't
+            noticed until :meth:`refresh_schema` is called.
+
+        """
+        if self._schema is None:
+            self.refresh_schema()
+        return self._schema
+
+    def refresh_schema(self)->Schema:
+        """Find the fields of every record again, the same way as the first time.
+
+        When lazy, the records are built again from the files, so only fields found in the files are kept.
+
+        :returns: Schema -- the new snapshot
+        """
+        self._schema = self._find_schema(self.iter_full())
+        return self._schema
+
+    @property
+    def fields(self):
+        return list(self.schema_snapshot.sorted)
 
     def has_field(self, field):
-        return field in self.fields
+        return field in self.schema_snapshot
 
     def __len__(self):
-        items = 0
-        for item in self._data:
-            items += len(item.item_level)
+        return self.object_count + self.page_count
+
+    @property
+    def object_count(self)->int:
+        """Number of objects, counted when the records are joined.
+
+        When lazy, the files are quickly read through the first time a count is needed, without building any records.
+        Iterating over every record also counts them.
+        """
+        if self._object_count is None:
+            self._object_count, self._page_count = self._count()
+        return self._object_count
+
+    @property
+    def page_count(self)->int:
+        """Number of pages of all the objects. See :attr:`object_count`."""
+        if self._page_count is None:
+            self._object_count, self._page_count = self._count()
+        return self._page_count
+
+    def where(self, conditions: dict=None, **fields)->list:
+        """Find the objects and pages where every field matches its condition. See
+        :meth:`cdm_metadata_tsv.where` for the conditions.
+
+        The objects and pages are kept the first time this is used so that fields can be indexed. When lazy, every
+        query reads through the files instead. Raises a KeyError if a field isn't in :attr:`schema_snapshot`.
+
+        :param conditions: field name to condition, for field names that can't be keyword arguments
+        :param fields: field name to condition
+        :returns: list -- matching FullRecords and pages, in the same order as iterating gives them
+        """
+        conditions = dict(conditions or {}, **fields)
+        # XML_order is only set on the pages as they're iterated over, so it's not in the schema
+        _check_fields(self.schema_snapshot.names | {"XML_order"}, conditions)
+        if self._query is None:
+            self._query = RecordQuery(self if self.lazy else list(self))
+        return self._query.where(conditions)
+
+    def iter_changes(self, previous, snapshot=None, check_content=False):
+        """Generator function that yields only the objects and pages that have been added, changed or removed since
+        a previous export. See :func:`MigrationTools.ExportDiff.iter_changes`.
+
+        :param previous: :class:`MigrationTools.ExportDiff.ExportSnapshot` of the previous export, or a CDM_Metadata
+            of it
+        :param snapshot: ExportSnapshot to add this export to while comparing, to save for next time
+        :param check_content: compare contents even if the modification date is the same
+        :yields: Change -- status, CONTENTdm number and the FullRecord or page, or None for a removed one
+
+        For example::
+
+            snapshot = ExportSnapshot()
+            for change in CDM_Metadata("export.xml", "export.tsv").iter_changes(ExportSnapshot.load("last_week"),
+                                                                                snapshot=snapshot):
+                print(change.status, change.key)
+            snapshot.save("last_week")
+
+        """
+        from .ExportDiff import iter_changes
+        yield from iter_changes(self, previous, snapshot=snapshot, check_content=check_content)
+
+    def _count(self)->tuple:
+        if self.xml_file is not None:
+            return cdm_metadata_xml.count_parts(self.xml_file)
+        return len(self.tsv_metadata), 0
 
-        return len(self._data) + items
+    def iter_full(self):
+        """Generator function that yields the FullRecord for each object.
+
+        When lazy, each FullRecord is built as it's asked for.
+
+        :yields: FullRecord
+        """
+        for full_record, _ in self._iter_joined():
+            yield full_record
+
+    def _iter_joined(self):
+        # Yields each FullRecord with the tsv rows of its pages if the join already found them, or None if they still
+        # have to be looked up.
+        if not self.lazy:
+            for full_record in self._data:
+                yield full_record, None
+            return
+
+        if self.merge_join:
+            from .MergeJoin import iter_merge_join
+            joined = iter_merge_join(self.xml_file, self.tsv_file)
+        elif self.spill_partitions is not None:
+            from .SpillJoin import iter_spilled_join
+            joined = iter_spilled_join(self.xml_file, self.tsv_file, self.spill_partitions, temp_dir=self.temp_dir)
+        elif self.xml_file is None:
+            joined = ((full_record, None) for full_record in
+                      CDM_Metadata.iter_full_records(tsv_metadata=self.tsv_metadata))
+        else:
+            joined = ((full_record, None) for full_record in
+                      CDM_Metadata.iter_full_records(xml_records=cdm_metadata_xml.iter_file(self.xml_file),
+                                                     lookup=self._lookup))
+        objects = 0
+        pages = 0
+        for full_record, page_rows in joined:
+            objects += 1
+            pages += len(full_record.item_level)
+            yield full_record, page_rows
+
+        # The number of parts can only be checked once all the xml records have been read. The spilled and merge joins
+        # check it themselves.
+        if self.xml_file is not None and self.tsv_metadata is not None and self._lookup is not None \
+                and objects + pages != len(self.tsv_metadata):
+            raise RecordMismatch
+        self._object_count = objects
+        self._page_count = pages
 
     def __iter__(self):
-        for i, object_record in enumerate(self._data):
+        """Yields each object as a FullRecord followed by each of its pages as a :class:`PageView`.
+
+        The pages of an object share a single copy of the object's fields instead of each getting their own.
+        """
+        return Instrumentation.timed_iter("CDM_Metadata.iterate", self._iter_parts())
+
+    def _iter_parts(self):
+        for i, (object_record, page_rows) in enumerate(self._iter_joined()):
             object_record['group_id'] = i
+            Instrumentation.count("CDM_Metadata.objects")
             yield object_record
+            object_info = None
             for page_number, item in enumerate(object_record.item_level):
-                santized = {k: ";".join(v) for k, v in item.items()}
+                if object_info is None:
+                    object_info = dict(object_record.object_level)
+
+                if page_rows is not None:
+                    matching = page_rows[page_number]
+                elif self._lookup is not None:
+                    matching = self._lookup(int(";".join(item['pageptr'])))
+                    Instrumentation.count("CDM_Metadata.lookups")
+                else:
+                    matching = None
+                Instrumentation.count("CDM_Metadata.pages")
+                yield PageView(object_info, item, matching, {'group_id': i, 'XML_order': page_number + 1})
 
-                object_info = dict(object_record.object_level)
-                for key in santized.keys():
-                    if key in object_info.keys():
-                        del object_info[key]
 
-                matching = self.tsv_metadata.get_record(int(santized['pageptr']))
-                item = {**object_info, **santized, **matching}
-                item['group_id'] = i
-                item['XML_order'] = page_number + 1
-                yield item
+    @staticmethod
+    def tsv_lookup(tsv_metadata: cdm_metadata_tsv):
+        """Get a function that finds the row of a TSV export by its CONTENTdm number, used to join it to the XML
+        export.
+
+        Loaded and random access TSV exports can already look up rows in constant time. A streaming TSV export is read
+        once into a hash table of CONTENTdm number to row instead of being read through again for every lookup.
+
+        :param tsv_metadata: cdm_metadata_tsv object contained the data for a CONTENTdm tsv export
+        :returns: function -- takes a CONTENTdm number and returns the row or raises an IndexError if there isn't one
+        """
+        if tsv_metadata.records is not None or tsv_metadata.random_access:
+            return tsv_metadata.get_record
+
+        table = tsv_metadata.build_index(tsv_metadata)
 
+        def lookup(contentDM_number):
+            try:
+                return table[str(contentDM_number)]
+            except KeyError:
+                raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+        return lookup
 
     @staticmethod
-    def create_full(xml_metadata: cdm_metadata_xml=None, tsv_metadata: cdm_metadata_tsv=None)->FullRecord:
+    def create_full(xml_metadata: cdm_metadata_xml=None, tsv_metadata: cdm_metadata_tsv=None,
+                    lookup=None)->FullRecord:
         """Factory function that takes a xml file and/or a tsv metadata object and builds a FullRecord object.
         If only a xml_metadata or a tsv_metadata object is give, the FullRecord is simply constructed based on that
         data alone. However if both are used in the, the data is joined.
 
+        The join is a hash join. Each XML record is matched to its TSV row by looking up its cdmid in a hash table of
+        the TSV rows, see :meth:`tsv_lookup`.
+
         :param xml_metadata: cdm_metadata_xml object contained the data for a CONTENTdm xml export
         :type xml_metadata: cdm_metadata_xml
         :param tsv_metadata: cdm_metadata_tsv object contained the data for a CONTENTdm tsv export
         :type tsv_metadata: cdm_metadata_tsv
+        :param lookup: function returned by :meth:`tsv_lookup` to reuse. One is made from tsv_metadata if not given.
 
         :returns: FullRecord object containing the data
 
@@ -597,28 +1461,40 @@ class CDM_Metadata:
                 # Check that the number of lines in the TSV match the number of XML records plus
                 # any elements that contains pages.
                 # Note: This doesn't match to see if these records matches.
-                total_xml_parts = len(list(xml_metadata.parts()))
+                total_xml_parts = xml_metadata.part_count()
                 total_tsv_records = len(tsv_metadata)
                 if total_tsv_records != total_xml_parts:
                     raise RecordMismatch
 
+                if lookup is None:
+                    lookup = CDM_Metadata.tsv_lookup(tsv_metadata)
 
-                for record in xml_metadata:
-                    pages = []
-                    cdmid = int(record['cdmid'])
-                    object_level = tsv_metadata.get_record(cdmid)
-                    if len(record.pages) > 0:
-                        for page in record.pages:
-                            # item = tsv_metadata.get_record(int(page['pageptr'][0]))
-                            pages.append(page)
-
-                    full_records.append(FullRecord(Record(object_level), pages))
+                full_records = list(CDM_Metadata.iter_full_records(xml_records=xml_metadata, lookup=lookup))
 
             else:
-                for record in xml_metadata:
-                    pages = record.pages
-                    object_level = record
-                    full_records.append(FullRecord(object_level, pages))
+                full_records = list(CDM_Metadata.iter_full_records(xml_records=xml_metadata))
+        elif tsv_metadata is not None:
+            full_records = list(CDM_Metadata.iter_full_records(tsv_metadata=tsv_metadata))
+        return full_records
+
+    @staticmethod
+    def iter_full_records(xml_records=None, tsv_metadata: cdm_metadata_tsv=None, lookup=None):
+        """Generator function that builds a FullRecord for each object, one at a time.
+
+        :param xml_records: iterable of Records from a xml export
+        :param tsv_metadata: cdm_metadata_tsv object, used when there are no xml records
+        :param lookup: function returned by :meth:`tsv_lookup` to join the xml records to the tsv export with
+        :yields: FullRecord
+        """
+        if xml_records is not None:
+            for record in xml_records:
+                pages = record.pages
+                if lookup is not None:
+                    cdmid = int(record['cdmid'])
+                    Instrumentation.count("CDM_Metadata.lookups")
+                    yield FullRecord(Record(lookup(cdmid)), pages)
+                else:
+                    yield FullRecord(record, pages)
         elif tsv_metadata is not None:
-            full_records = [FullRecord(Record(rec), []) for rec in tsv_metadata]
-        return full_records
\ No newline at end of file
+            for rec in tsv_metadata:
+                yield FullRecord(Record(rec), [])
\ No newline at end of file
@@ -0,0 +1,190 @@
+import csv
+import io
+import mmap
+import os
+import pickle
+import re
+
+NEWLINE_PATTERN = re.compile(rb"\r\n|\r|\n")
+QUOTE = b'"'
+TAB = b"\t"
+SIDECAR_EXTENSION = ".offsets"
+SIDECAR_VERSION = 2
+
+
+def _ends_quoted(data, start, end, quoted)->bool:
+    # Reads the cells of one line the way csv does and tells if the line ends inside a quoted cell. A quote only
+    # starts a quoted cell at the start of a cell, so a quote anywhere else, like 10" wide, is part of the cell.
+    position = start
+    while True:
+        if quoted:
+            quote = data.find(QUOTE, position, end)
+            if quote == -1:
+                return True
+            if quote + 1 < end and data[quote + 1:quote + 2] == QUOTE:
+                # Escaped by doubling it
+                position = quote + 2
+                continue
+            quoted = False
+            position = quote + 1
+        elif position < end and data[position:position + 1] == QUOTE:
+            quoted = True
+            position += 1
+            continue
+        tab = data.find(TAB, position, end)
+        if tab == -1:
+            return False
+        position = tab + 1
+
+
+def row_spans(data):
+    """Generator function that finds where each row of a tab separated file starts and ends.
+
+    A new line inside a quoted cell doesn't end the row. Quotes are read the same way as the csv module reads them: a
+    cell is only quoted if it starts with a quote, quotes inside a quoted cell are escaped by doubling them, and a
+    quote anywhere else in a cell is just part of its value.
+
+    :param data: bytes or a memory map of the file
+    :yields: tuple -- start and end byte offsets of a row, including its line ending
+    """
+    start = 0
+    position = 0
+    quoted = False
+    for match in NEWLINE_PATTERN.finditer(data):
+        if quoted or data.find(QUOTE, position, match.start()) != -1:
+            quoted = _ends_quoted(data, position, match.start(), quoted)
+        position = match.end()
+        if not quoted:
+            yield start, position
+            start = position
+    if start < len(data):
+        yield start, len(data)
+
+
+def parse_row(raw: bytes)->list:
+    """Parse a single row of a ContentDM TSV file into a list of cells.
+
+    Line endings inside quoted cells are translated to \\n, the same as reading the file in text mode does.
+    """
+    text = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    for row in csv.reader(io.StringIO(text), dialect="excel-tab"):
+        return row
+    return []
+
+
+class TsvOffsetIndex:
+    """Random access to the rows of a ContentDM TSV file without loading the whole file.
+
+    The file is scanned once to find the byte offsets of each row, keyed by the CONTENTdm number. After that, getting
+    a record only parses the one row it needs out of a memory map of the file.
+
+    The offsets are saved next to the TSV file with the extension ".offsets" so that opening the same file again
+    doesn't need to scan it. If the TSV file has changed size or modification time since the offsets were saved, the
+    file is scanned again.
+
+    Args:
+        tsv_file: ContentDM Metadata TSV file name
+        key_field: column used to look up rows
+        sidecar: file to save the offsets to. Set to False to not save them.
+
+    """
+
+    def __init__(self, tsv_file, key_field="CONTENTdm number", sidecar=None):
+        self.filename = tsv_file
+        self.key_field = key_field
+        self.sidecar = tsv_file + SIDECAR_EXTENSION if sidecar is None else sidecar
+        with open(tsv_file, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        saved = self.load_sidecar()
+        if saved is not None:
+            self.fields, self.rows, self._offsets = saved
+        else:
+            self.fields, self.rows, self._offsets = self.scan()
+            self.save_sidecar()
+
+    def __contains__(self, contentDM_number):
+        return str(contentDM_number) in self._offsets
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        self._map.close()
+
+    def scan(self):
+        """Read through the file and find the offsets for each row.
+
+        :returns: tuple -- the column headers, the number of rows and a dict of key to start and end byte offsets.
+        """
+        offsets = dict()
+        fields = None
+        key_column = None
+        rows = 0
+        for start, end in row_spans(self._map):
+            row = parse_row(self._map[start:end])
+            if not row:
+                continue
+            if fields is None:
+                fields = row
+                key_column = fields.index(self.key_field)
+                continue
+            rows += 1
+            if key_column < len(row):
+                offsets.setdefault(row[key_column], (start, end))
+        return fields, rows, offsets
+
+    def get_record(self, contentDM_number)->dict:
+        """Get a single record from a ContentDM number
+
+        :param contentDM_number: The ContentDM number
+        :returns:   dict -- Single item record
+        """
+        try:
+            start, end = self._offsets[str(contentDM_number)]
+        except KeyError:
+            raise IndexError("No record for \"{}\" was not found in the metadata".format(contentDM_number))
+        row = parse_row(self._map[start:end])
+        # Same as csv.DictReader for rows with too few or too many cells
+        record = dict(zip(self.fields, row))
+        for field in self.fields[len(row):]:
+            record[field] = None
+        if len(row) > len(self.fields):
+            record[None] = row[len(self.fields):]
+        return record
+
+    def _fingerprint(self):
+        stat = os.stat(self.filename)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load_sidecar(self):
+        if not self.sidecar or not os.path.exists(self.sidecar):
+            return None
+        try:
+            with open(self.sidecar, "rb") as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if saved.get("version") != SIDECAR_VERSION \
+                or saved.get("fingerprint") != self._fingerprint() \
+                or saved.get("key_field") != self.key_field:
+            return None
+        return saved["fields"], saved["rows"], saved["offsets"]
+
+    def save_sidecar(self):
+        if not self.sidecar:
+            return
+        saved = {
+            "version": SIDECAR_VERSION,
+            "fingerprint": self._fingerprint(),
+            "key_field": self.key_field,
+            "fields": self.fields,
+            "rows": self.rows,
+            "offsets": self._offsets,
+        }
+        try:
+            with open(self.sidecar, "wb") as f:
+                pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # Not being able to save the offsets only means the file has to be scanned again next time
+            pass
@@ -0,0 +1,117 @@
+import concurrent.futures
+import mmap
+import os
+
+RECORD_START = b"<record"
+RECORD_END = b"</record>"
+CHUNKS_PER_WORKER = 4
+
+# What can follow RECORD_START in the start tag of a record element, so tags like <records> aren't taken for one
+RECORD_START_ENDS = frozenset(b">/ \t\r\n")
+
+
+def _find_record_start(data, start=0)->int:
+    position = data.find(RECORD_START, start)
+    while position != -1:
+        following = position + len(RECORD_START)
+        if following < len(data) and data[following] in RECORD_START_ENDS:
+            return position
+        position = data.find(RECORD_START, following)
+    return -1
+
+
+def split_records(xml_file, chunks: int):
+    """Split a XML export into byte ranges that each hold only whole top level record elements.
+
+    .. Note::
+
+        The boundaries are found by looking for the text "</record>", so the export must not have it inside a
+        CDATA section or comment. CONTENTdm exports don't.
+
+    :param xml_file: ContentDM Metadata XML file name
+    :param chunks: number of ranges to try to split the records into
+    :returns: tuple -- end of the text before the first record, start of the text after the last record, and a list of
+        start and end byte offsets for each range
+    """
+    with open(xml_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0, 0, []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            first = _find_record_start(data)
+            last = data.rfind(RECORD_END)
+            if first == -1 or last == -1:
+                return len(data), len(data), []
+            last += len(RECORD_END)
+
+            ranges = []
+            chunk_size = max(1, (last - first) // max(1, chunks))
+            start = first
+            while start < last:
+                end = data.find(RECORD_END, min(start + chunk_size, last - len(RECORD_END)))
+                end = last if end == -1 else min(end + len(RECORD_END), last)
+                ranges.append((start, end))
+                start = end
+            return first, last, ranges
+
+
+def parse_chunk(task):
+    """Parse the records found in one byte range of a XML export.
+
+    The text before the first record and after the last record are put around the range so it can be parsed as a
+    document of its own with the same encoding and root element.
+
+    Parser errors are raised as a ValueError, because the parsers' own exceptions can't always be sent back from a
+    worker process.
+
+    :param task: tuple of file name, end of the prolog, start of the epilogue, start and end of the range, fields and
+        the name of the parser backend
+    :returns: tuple -- RecordBatch of Records and the set of field names found
+    """
+    from .MetadataReader import cdm_metadata_xml
+    from .RecordBatch import RecordBatch
+    import io
+
+    xml_file, prolog_end, epilogue_start, start, end, fields, backend = task
+    with open(xml_file, "rb") as f:
+        prolog = f.read(prolog_end)
+        f.seek(start)
+        body = f.read(end - start)
+        f.seek(epilogue_start)
+        epilogue = f.read()
+
+    found_fields = set()
+    try:
+        records = RecordBatch(
+            cdm_metadata_xml.iter_records(io.BytesIO(prolog + body + epilogue), fields, found_fields, backend))
+    except SyntaxError as e:
+        # Both ElementTree's ParseError and lxml's XMLSyntaxError are SyntaxErrors
+        raise ValueError("Unable to parse the records of {} between bytes {} and {}: {}".format(
+            xml_file, start, end, e)) from None
+    return records, found_fields
+
+
+def iter_records_parallel(xml_file, workers=None, fields=None, found_fields=None, backend=None):
+    """Generator function that parses the records of a XML export in a pool of processes.
+
+    The export is split at top level record boundaries and each part is parsed by
+    :meth:`MigrationTools.MetadataReader.cdm_metadata_xml.iter_records` in a separate process. Records are yielded in
+    the same order as they are in the file.
+
+    :param xml_file: ContentDM Metadata XML file name
+    :param workers: number of processes to use. Defaults to the number of CPUs.
+    :param fields: only keep the elements with these names. None keeps everything.
+    :param found_fields: set to add the name of every element found directly in a record to
+    :param backend: name of the parser each process uses. None uses lxml if it's installed.
+    :yields: Record
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    prolog_end, epilogue_start, ranges = split_records(xml_file, workers * CHUNKS_PER_WORKER)
+    fields = None if fields is None else list(fields)
+    tasks = [(xml_file, prolog_end, epilogue_start, start, end, fields, backend) for start, end in ranges]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for records, chunk_fields in executor.map(parse_chunk, tasks):
+            if found_fields is not None:
+                found_fields.update(chunk_fields)
+            yield from records
@@ -0,0 +1,197 @@
+import bisect
+import re
+from collections import defaultdict
+from collections.abc import Sequence
+
+SEPARATOR = ";"
+
+
+class Prefix:
+    """Matches values that start with prefix."""
+    __slots__ = ("prefix",)
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def __repr__(self):
+        return "Prefix({!r})".format(self.prefix)
+
+
+class Regex:
+    """Matches values where the regular expression matches anywhere in the value, the same as re.search()."""
+    __slots__ = ("pattern",)
+
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+
+    def __repr__(self):
+        return "Regex({!r})".format(self.pattern.pattern)
+
+
+class AnyValue:
+    """Matches fields with more than one value separated by ";" if any one of the values matches condition.
+
+    :param condition: a value, :class:`Prefix` or :class:`Regex`
+    """
+    __slots__ = ("condition",)
+
+    def __init__(self, condition):
+        self.condition = condition
+
+    def __repr__(self):
+        return "AnyValue({!r})".format(self.condition)
+
+
+def field_value(record, field):
+    """Get the value of a field of a record as used by queries.
+
+    Records from a xml export have a list of values for each field. These are joined with ";", the same as
+    CDM_Metadata does. A field that a record doesn't have, or that has no values, is None.
+    """
+    data = getattr(record, "data", None)
+    if data is not None:
+        values = data.get(field)
+        return SEPARATOR.join(values) if values else None
+    try:
+        return record[field]
+    except KeyError:
+        return None
+
+
+def split_values(value)->list:
+    if not isinstance(value, str):
+        return [value]
+    return [part.strip() for part in value.split(SEPARATOR) if part.strip()]
+
+
+def _matches(condition, value)->bool:
+    if isinstance(condition, Prefix):
+        return isinstance(value, str) and value.startswith(condition.prefix)
+    if isinstance(condition, Regex):
+        return isinstance(value, str) and condition.pattern.search(value) is not None
+    return value == condition
+
+
+def matches(condition, value)->bool:
+    """Check a single value against a condition without using an index."""
+    if value is None:
+        return False
+    if isinstance(condition, AnyValue):
+        return any(_matches(condition.condition, part) for part in split_values(value))
+    return _matches(condition, value)
+
+
+class FieldIndex:
+    """Hash index of one field from value to the positions of the records with that value.
+
+    The values are also kept sorted, for finding values by prefix with a binary search. The sorted values are only
+    made the first time a prefix is looked up, and made again after new values are added.
+
+    Args:
+        split: index each ";" separated value on its own
+    """
+    __slots__ = ("split", "positions", "_sorted")
+
+    def __init__(self, split=False):
+        self.split = split
+        self.positions = defaultdict(list)
+        self._sorted = None
+
+    def add(self, position: int, value):
+        if value is None:
+            return
+        values = split_values(value) if self.split else [value]
+        for value in values:
+            positions = self.positions[value]
+            if not positions or positions[-1] != position:
+                positions.append(position)
+                if len(positions) == 1:
+                    self._sorted = None
+
+    @property
+    def sorted_values(self)->list:
+        if self._sorted is None:
+            self._sorted = sorted(value for value in self.positions if isinstance(value, str))
+        return self._sorted
+
+    def find(self, condition)->set:
+        """Get the positions of the records that match a condition."""
+        if isinstance(condition, Prefix):
+            values = self.sorted_values
+            start = bisect.bisect_left(values, condition.prefix)
+            found = set()
+            for value in values[start:]:
+                if not value.startswith(condition.prefix):
+                    break
+                found.update(self.positions[value])
+            return found
+        if isinstance(condition, Regex):
+            found = set()
+            for value, positions in self.positions.items():
+                if _matches(condition, value):
+                    found.update(positions)
+            return found
+        return set(self.positions.get(condition, ()))
+
+
+class RecordQuery:
+    """Finds records by the values of their fields.
+
+    If records is a sequence, such as a list, an index is made for each field the first time it's queried and is
+    reused by later queries. Otherwise every query reads through all of the records.
+
+    Args:
+        records: records to search
+
+    Example::
+
+        query = RecordQuery(records)
+        query.where({"Creator": "Baumann, Oskar", "Date": Prefix("18")})
+        query.where({"Subject": AnyValue("Maps")})
+
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.indexed = isinstance(records, Sequence)
+        self._indexes = dict()
+
+    def index(self, field, split=False)->FieldIndex:
+        key = (field, split)
+        index = self._indexes.get(key)
+        if index is None:
+            index = FieldIndex(split)
+            for position, record in enumerate(self.records):
+                index.add(position, field_value(record, field))
+            self._indexes[key] = index
+        return index
+
+    def added(self):
+        """Add the last record of records to the indexes that have already been made."""
+        position = len(self.records) - 1
+        record = self.records[position]
+        for (field, _), index in self._indexes.items():
+            index.add(position, field_value(record, field))
+
+    def where(self, conditions: dict)->list:
+        """Get the records that match every condition, in the order they are in records.
+
+        :param conditions: field name to a value, :class:`Prefix`, :class:`Regex` or :class:`AnyValue`
+        :returns: list of matching records
+        """
+        if not self.indexed:
+            return [record for record in self.records
+                    if all(matches(condition, field_value(record, field)) for field, condition in conditions.items())]
+
+        found = None
+        for field, condition in conditions.items():
+            if isinstance(condition, AnyValue):
+                positions = self.index(field, split=True).find(condition.condition)
+            else:
+                positions = self.index(field).find(condition)
+            found = positions if found is None else found & positions
+            if not found:
+                return []
+        if found is None:
+            return list(self.records)
+        return [self.records[position] for position in sorted(found)]
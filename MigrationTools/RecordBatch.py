@@ -0,0 +1,135 @@
+from collections import defaultdict
+from collections.abc import Sequence
+
+from .ColumnarStorage import ListRowView
+from .MetadataReader import FullRecord, Record
+
+# How the data of a mapping is rebuilt
+_DEFAULTDICT = 0
+_DICT = 1
+
+# What kind of record a packed item is
+_RECORD = 0
+_FULL_RECORD = 1
+_MAPPING = 2
+
+
+class _Packer:
+    """Packs mappings into a list of field names, a list of layouts and tuples of values.
+
+    A layout is a tuple of positions in the list of field names. Mappings with the same keys in the same order share a
+    layout, so each field name and each layout is only written once for the whole batch. Equal strings are replaced
+    by one shared object, which pickle then only writes once.
+    """
+
+    def __init__(self):
+        self.fields = []
+        self.layouts = []
+        self._field_positions = dict()
+        self._layout_positions = dict()
+        self._strings = dict()
+
+    def _value(self, value):
+        if isinstance(value, str):
+            return self._strings.setdefault(value, value)
+        if isinstance(value, list):
+            strings = self._strings
+            return [strings.setdefault(item, item) if isinstance(item, str) else item for item in value]
+        return value
+
+    def _layout(self, keys)->int:
+        keys = tuple(keys)
+        position = self._layout_positions.get(keys)
+        if position is None:
+            layout = []
+            for key in keys:
+                field = self._field_positions.get(key)
+                if field is None:
+                    field = len(self.fields)
+                    self._field_positions[key] = field
+                    self.fields.append(key)
+                layout.append(field)
+            position = len(self.layouts)
+            self._layout_positions[keys] = position
+            self.layouts.append(tuple(layout))
+        return position
+
+    def mapping(self, mapping):
+        kind = _DEFAULTDICT if isinstance(mapping, (defaultdict, ListRowView)) else _DICT
+        keys = list(mapping.keys())
+        return kind, self._layout(keys), tuple(self._value(mapping[key]) for key in keys)
+
+    def record(self, record: Record):
+        return _RECORD, self.mapping(record.data), [self.mapping(page) for page in record._pages]
+
+    def item(self, item):
+        if isinstance(item, FullRecord):
+            return (_FULL_RECORD, self.item(item.object_level), [self.mapping(page) for page in item.item_level],
+                    dict(item.additional_info))
+        if isinstance(item, Record):
+            return self.record(item)
+        return _MAPPING, self.mapping(item)
+
+
+class _Unpacker:
+    def __init__(self, fields, layouts):
+        self.layouts = [tuple(fields[field] for field in layout) for layout in layouts]
+
+    def mapping(self, packed):
+        kind, layout, values = packed
+        data = zip(self.layouts[layout], values)
+        if kind == _DEFAULTDICT:
+            return defaultdict(list, data)
+        return dict(data)
+
+    def item(self, packed):
+        if packed[0] == _FULL_RECORD:
+            _, object_level, item_level, additional_info = packed
+            full_record = FullRecord(self.item(object_level), [self.mapping(page) for page in item_level])
+            full_record.additional_info = additional_info
+            return full_record
+        if packed[0] == _RECORD:
+            _, data, pages = packed
+            record = Record(self.mapping(data))
+            for page in pages:
+                record.add_page(self.mapping(page))
+            return record
+        return self.mapping(packed[1])
+
+
+def _unpack_batch(fields, layouts, items):
+    unpacker = _Unpacker(fields, layouts)
+    return RecordBatch([unpacker.item(item) for item in items])
+
+
+class RecordBatch(Sequence):
+    """A list of Record, FullRecord or plain mapping objects that is small and quick to pickle.
+
+    When pickled, each field name is written once for the whole batch and each record only stores its values. This
+    makes sending records between processes, such as from a multiprocessing pool, a lot cheaper than pickling the
+    records one at a time.
+
+    Columnar record data is turned back into a defaultdict when the batch is unpickled.
+
+    Example::
+
+        batch = RecordBatch(cdm_metadata_xml("export.xml"))
+        payload = pickle.dumps(batch)
+        records = list(pickle.loads(payload))
+
+    """
+    __slots__ = ("records",)
+
+    def __init__(self, records):
+        self.records = list(records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __reduce__(self):
+        packer = _Packer()
+        items = [packer.item(record) for record in self.records]
+        return _unpack_batch, (packer.fields, packer.layouts, items)
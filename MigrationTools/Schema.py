@@ -0,0 +1,59 @@
+def _sort_key(field):
+    # Rows of a TSV export with more cells than headers have the extra cells under None
+    return field is None, field or ""
+
+
+class Schema:
+    """The field names found in a set of records.
+
+    The names are kept as a frozenset so checking for a field takes constant time, and as a sorted list that is only
+    sorted again after a new field has been added.
+
+    Args:
+        fields: field names to start with
+
+    Example::
+
+        schema = Schema(["Title", "Creator"])
+        schema.update(["Title", "Date"])
+        print("Date" in schema, schema.sorted)
+
+    """
+    __slots__ = ("names", "_sorted")
+
+    def __init__(self, fields=()):
+        self.names = frozenset(fields)
+        self._sorted = None
+
+    def __contains__(self, field):
+        return field in self.names
+
+    def __iter__(self):
+        return iter(self.sorted)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.sorted)
+
+    @property
+    def sorted(self)->list:
+        """The field names in sorted order. Shared between calls, so don't change it."""
+        if self._sorted is None:
+            self._sorted = sorted(self.names, key=_sort_key)
+        return self._sorted
+
+    def update(self, fields)->bool:
+        """Add the fields that aren't already in the schema.
+
+        :param fields: field names
+        :returns: bool -- True if any new fields were added
+        """
+        names = self.names
+        new = [field for field in fields if field not in names]
+        if not new:
+            return False
+        self.names = names.union(new)
+        self._sorted = None
+        return True
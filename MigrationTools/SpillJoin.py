@@ -0,0 +1,188 @@
+"""Join of a XML export to its TSV export that keeps most of both on disk, for exports too large to join in memory.
+
+Both exports are split into partitions by the CONTENTdm number of each part, the object or page, and written to
+temporary files. Each partition of TSV rows is then loaded on its own to look up the parts in the same partition.
+Finally the XML records are read back in their original order along with the rows that were looked up for them. Only
+one partition of TSV rows is ever in memory at a time.
+
+Example::
+
+    for full_record, page_rows in iter_spilled_join("export.xml", "export.tsv", partitions=16):
+        print(full_record["Title"], len(page_rows))
+
+"""
+import math
+import os
+import pickle
+import tempfile
+import warnings
+
+from . import Instrumentation
+from .MetadataReader import FullRecord, Record, RecordMismatch, cdm_metadata_tsv, cdm_metadata_xml
+
+# Roughly how many bytes of memory the parsed records take up for each byte of an export file
+MEMORY_PER_FILE_BYTE = 4
+
+# Each partition has a file open at the same time, so this also limits the number of open files. A join can have up to
+# this many files open at once, plus the export being read.
+MAX_PARTITIONS = 256
+
+
+def estimate_memory(xml_file, tsv_file)->int:
+    """Guess how much memory joining two exports in memory would take, in bytes, from the sizes of the files."""
+    return MEMORY_PER_FILE_BYTE * (os.path.getsize(xml_file) + os.path.getsize(tsv_file))
+
+
+def available_memory(memory_budget: int)->int:
+    """Get how much of a memory budget for the whole process is left for a join, going by how much memory the process
+    is using right now. Memory that was used before and has since been freed counts as available.
+    """
+    return max(0, memory_budget - (Instrumentation.current_memory() or 0))
+
+
+def partitions_for(tsv_file, available: int)->int:
+    """Get the number of partitions needed so that a single partition of TSV rows uses at most half of the available
+    memory. The other half is left for everything else.
+
+    Warns if even :data:`MAX_PARTITIONS` partitions are too big for the available memory. The
+    join still works, but goes over the budget.
+
+    :param tsv_file: ContentDM Metadata TSV file name
+    :param available: bytes of memory the join can use
+    :returns: int -- number of partitions, at least 1 and at most :data:`MAX_PARTITIONS`
+    """
+    needed = MEMORY_PER_FILE_BYTE * os.path.getsize(tsv_file)
+    partitions = math.ceil(needed / max(1, available // 2))
+    if partitions > MAX_PARTITIONS:
+        warnings.warn("The memory budget can't be met. Each of the {} partitions of {} will use about {} bytes, but "
+                      "only {} bytes are available".format(MAX_PARTITIONS, tsv_file, needed // MAX_PARTITIONS,
+                                                           available))
+    return max(1, min(MAX_PARTITIONS, partitions))
+
+
+def part_key(value)->str:
+    """Get the key a CONTENTdm number is looked up by, the same as :meth:`CDM_Metadata.tsv_lookup` is given."""
+    return str(int(value))
+
+
+def _iter_pickled(f):
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
+
+
+class _Partitions:
+    # One temporary file for each partition, all written to at the same time.
+
+    def __init__(self, directory, name, count):
+        self.names = [os.path.join(directory, "{}{}".format(name, i)) for i in range(count)]
+        self.files = [open(filename, "wb") for filename in self.names]
+
+    def write(self, partition, item):
+        pickle.dump(item, self.files[partition], protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+
+def _partition_rows(tsv_file, directory, partitions)->tuple:
+    rows = _Partitions(directory, "tsv", partitions)
+    count = 0
+    try:
+        for row in cdm_metadata_tsv.iter_file(tsv_file):
+            count += 1
+            number = cdm_metadata_tsv.record_number(row)
+            if number is not None:
+                rows.write(hash(number) % partitions, (number, row))
+    finally:
+        rows.close()
+    return rows.names, count
+
+
+def _spill_records(xml_file, directory, partitions, backend)->tuple:
+    # The records are written in their original order, and the key of each part is written to its partition in the
+    # same order, so every partition of keys is in the order the parts will be read back in.
+    records_file = os.path.join(directory, "records")
+    keys = _Partitions(directory, "keys", partitions)
+    count = 0
+    try:
+        with open(records_file, "wb") as records:
+            for record in cdm_metadata_xml.iter_file(xml_file, backend=backend):
+                pickle.dump(record, records, protocol=pickle.HIGHEST_PROTOCOL)
+                for key in record_keys(record):
+                    keys.write(hash(key) % partitions, key)
+                count += 1 + record.page_count
+    finally:
+        keys.close()
+    return records_file, keys.names, count
+
+
+def record_keys(record):
+    """Generator function that yields the key of a XML record's object and then the key of each of its pages."""
+    yield part_key(record['cdmid'])
+    for page in record.pages:
+        yield part_key(";".join(page['pageptr']))
+
+
+def _resolve(rows_file, keys_file, resolved_file):
+    # Looks up every key of a partition in that partition's rows. The first row with a number wins, the same as the
+    # index of a loaded TSV export.
+    table = dict()
+    with open(rows_file, "rb") as f:
+        for number, row in _iter_pickled(f):
+            table.setdefault(number, row)
+    os.remove(rows_file)
+
+    with open(keys_file, "rb") as keys, open(resolved_file, "wb") as resolved:
+        for key in _iter_pickled(keys):
+            row = table.get(key)
+            if row is None:
+                raise IndexError("No record for \"{}\" was not found in the metadata".format(key))
+            pickle.dump(row, resolved, protocol=pickle.HIGHEST_PROTOCOL)
+    os.remove(keys_file)
+
+
+def iter_spilled_join(xml_file, tsv_file, partitions: int, temp_dir=None, backend=None):
+    """Generator function that joins a XML export to its TSV export using temporary files.
+
+    Gives the same FullRecords in the same order as :meth:`CDM_Metadata.create_full`. Because a page's row can be in
+    any partition, the TSV rows of the pages are looked up here as well and given along with each FullRecord.
+
+    Raises RecordMismatch before yielding anything if the exports don't have the same number of parts, and IndexError
+    if a part of the XML export isn't in the TSV export.
+
+    A temporary file is kept open for every partition at the same time, so the limit on open files has to allow for
+    that many more.
+
+    :param xml_file: ContentDM Metadata XML file name
+    :param tsv_file: ContentDM Metadata TSV file name
+    :param partitions: number of partitions to split the exports into, see :func:`partitions_for`
+    :param temp_dir: directory to make the temporary files in. None uses the system's temporary directory.
+    :param backend: name of the XML parser to use
+    :yields: tuple -- FullRecord and a list of the TSV row of each of its pages
+    """
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix="spill_join") as directory:
+        with Instrumentation.phase("SpillJoin.partition"):
+            rows_files, row_count = _partition_rows(tsv_file, directory, partitions)
+            records_file, keys_files, part_count = _spill_records(xml_file, directory, partitions, backend)
+        if row_count != part_count:
+            raise RecordMismatch
+
+        with Instrumentation.phase("SpillJoin.resolve"):
+            resolved_files = [os.path.join(directory, "resolved{}".format(i)) for i in range(partitions)]
+            for rows_file, keys_file, resolved_file in zip(rows_files, keys_files, resolved_files):
+                _resolve(rows_file, keys_file, resolved_file)
+
+        resolved = [open(filename, "rb") for filename in resolved_files]
+        try:
+            with open(records_file, "rb") as records:
+                for record in _iter_pickled(records):
+                    rows = [pickle.load(resolved[hash(key) % partitions]) for key in record_keys(record)]
+                    Instrumentation.count("SpillJoin.lookups", len(rows))
+                    yield FullRecord(Record(rows[0]), record.pages), rows[1:]
+        finally:
+            for f in resolved:
+                f.close()
@@ -0,0 +1,88 @@
+"""Parsers that :class:`MigrationTools.MetadataReader.cdm_metadata_xml` can read XML exports with.
+
+lxml is used when it's installed because it parses faster, and the standard library's ElementTree is used when it
+isn't. Both give exactly the same records.
+
+Example::
+
+    metadata = cdm_metadata_xml("export.xml", backend="etree")
+
+"""
+from xml.etree import ElementTree
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+EVENTS = ("start", "end")
+PAGES_PATH = "structure/page"
+NODE_PAGES_PATH = "structure/node/page"
+
+
+class ElementTreeBackend:
+    """Parses with the standard library's xml.etree.ElementTree."""
+    name = "etree"
+
+    def iterparse(self, source):
+        return ElementTree.iterparse(source, events=EVENTS)
+
+    def find_pages(self, element)->list:
+        pages = element.findall(PAGES_PATH)
+        if len(pages) == 0:
+            pages = element.findall(NODE_PAGES_PATH)
+        return pages
+
+
+class LxmlBackend:
+    """Parses with lxml, finding the pages of a record with XPath expressions that are compiled once.
+
+    Comments and processing instructions are dropped while parsing, the same as ElementTree does.
+    """
+    name = "lxml"
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise ImportError("lxml is not installed")
+        self._pages = lxml_etree.XPath(PAGES_PATH)
+        self._node_pages = lxml_etree.XPath(NODE_PAGES_PATH)
+
+    def iterparse(self, source):
+        return lxml_etree.iterparse(source, events=EVENTS, remove_comments=True, remove_pis=True, huge_tree=True)
+
+    def find_pages(self, element)->list:
+        return self._pages(element) or self._node_pages(element)
+
+
+BACKENDS = {
+    ElementTreeBackend.name: ElementTreeBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+_loaded = dict()
+
+
+def available_backends()->list:
+    """Get the names of the backends that can be used here."""
+    return [name for name in BACKENDS if name != LxmlBackend.name or lxml_etree is not None]
+
+
+def get_backend(backend=None):
+    """Get a parser backend.
+
+    :param backend: name of a backend in :data:`BACKENDS`, or a backend itself. None uses lxml if it's installed and
+        ElementTree if it isn't.
+    :returns: the backend
+    """
+    if backend is None:
+        backend = LxmlBackend.name if lxml_etree is not None else ElementTreeBackend.name
+    if not isinstance(backend, str):
+        return backend
+    loaded = _loaded.get(backend)
+    if loaded is None:
+        try:
+            backend_class = BACKENDS[backend]
+        except KeyError:
+            raise ValueError("Unknown XML backend {!r}, expected one of {}".format(backend, sorted(BACKENDS)))
+        loaded = _loaded[backend] = backend_class()
+    return loaded
@@ -0,0 +1,46 @@
+"""Times loading and joining many collections one at a time and with a pool of processes.
+
+Usage::
+
+    python -m benchmarks.bench_batch_loader [collections] [parts]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+from MigrationTools.BatchLoader import load_collections
+from benchmarks.generator import write_export
+
+
+def run(pairs, workers):
+    started = time.perf_counter()
+    records = sum(len(collection.records) for collection in load_collections(pairs, workers=workers))
+    return records, time.perf_counter() - started
+
+
+def main():
+    collections = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    parts = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pairs = []
+        for i in range(collections):
+            xml_file = os.path.join(tmp_dir, "collection{}.xml".format(i))
+            tsv_file = os.path.join(tmp_dir, "collection{}.tsv".format(i))
+            write_export(xml_file, tsv_file, parts, seed=i)
+            pairs.append((xml_file, tsv_file))
+
+        print("{} collections of {} parts, {} CPUs".format(collections, parts, os.cpu_count()))
+        print("{:>8} {:>10} {:>12} {:>10}".format("workers", "records", "total (s)", "speedup"))
+        baseline = None
+        workers = 1
+        while workers <= max(1, os.cpu_count() or 1):
+            records, total = run(pairs, workers)
+            baseline = baseline or total
+            print("{:>8} {:>10} {:>12.3f} {:>10.2f}".format(workers, records, total, baseline / total))
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()
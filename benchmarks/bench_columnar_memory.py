@@ -0,0 +1,42 @@
+"""Compares the memory used per record by loading a TSV export as dicts and with columnar=True.
+
+Usage::
+
+    python -m benchmarks.bench_columnar_memory
+
+"""
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from MigrationTools import cdm_metadata_tsv
+from benchmarks.generator import write_tsv
+
+SIZES = (10000, 100000)
+
+
+def retained_memory(tsv_file, columnar):
+    gc.collect()
+    tracemalloc.start()
+    metadata = cdm_metadata_tsv(tsv_file, columnar=columnar)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del metadata
+    return retained
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("{:>8} {:>20} {:>20} {:>8}".format("rows", "dicts (B/record)", "columnar (B/record)", "ratio"))
+        for size in SIZES:
+            tsv_file = os.path.join(tmp_dir, "{}.tsv".format(size))
+            write_tsv(tsv_file, size)
+            dicts = retained_memory(tsv_file, columnar=False) / size
+            columnar = retained_memory(tsv_file, columnar=True) / size
+            print("{:>8} {:>20.1f} {:>20.1f} {:>8.1f}".format(size, dicts, columnar, dicts / columnar))
+
+
+if __name__ == '__main__':
+    main()
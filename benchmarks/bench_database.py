@@ -0,0 +1,66 @@
+"""Times ingesting a XML export into a MetadataDatabase, opening it again and looking up records, compared to loading
+the export with cdm_metadata_xml.
+
+Usage::
+
+    python -m benchmarks.bench_database [parts]
+
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from MigrationTools import cdm_metadata_xml
+from MigrationTools.MetadataDatabase import MetadataDatabase
+from benchmarks.generator import iter_export, write_xml
+
+LOOKUPS = 1000
+
+
+def timed(function):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function()
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, total, peak
+
+
+def lookups(metadata, numbers):
+    for number in numbers:
+        metadata.get_record(number)
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        summary = write_xml(xml_file, parts)
+        numbers = random.Random(0).sample([export_object.number for export_object in iter_export(parts)],
+                                          min(LOOKUPS, summary.objects))
+
+        print("{} objects, {} parts".format(summary.objects, summary.parts))
+        print("{:>28} {:>12} {:>12}".format("", "time (s)", "peak (MiB)"))
+        loaded, total, peak = timed(lambda: cdm_metadata_xml(xml_file))
+        print("{:>28} {:>12.3f} {:>12.1f}".format("load cdm_metadata_xml", total, peak / 1024 / 1024))
+        database, total, peak = timed(lambda: MetadataDatabase(xml_file))
+        print("{:>28} {:>12.3f} {:>12.1f}".format("ingest MetadataDatabase", total, peak / 1024 / 1024))
+        database.close()
+        database, total, peak = timed(lambda: MetadataDatabase(xml_file))
+        print("{:>28} {:>12.3f} {:>12.1f}".format("reopen MetadataDatabase", total, peak / 1024 / 1024))
+
+        _, total, _ = timed(lambda: lookups(loaded, numbers))
+        print("{:>28} {:>12.3f}".format("{} lookups, loaded".format(len(numbers)), total))
+        _, total, _ = timed(lambda: lookups(database, numbers))
+        print("{:>28} {:>12.3f}".format("{} lookups, database".format(len(numbers)), total))
+        _, total, peak = timed(lambda: sum(1 for _ in database))
+        print("{:>28} {:>12.3f} {:>12.1f}".format("iterate database", total, peak / 1024 / 1024))
+        database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Times joining a XML export to a TSV export with CDM_Metadata as the collection grows.
+
+Parsing is done before timing starts, so only the join itself is measured. With a hash join the time per object
+should stay about the same as the collection grows.
+
+Usage::
+
+    python -m benchmarks.bench_join
+
+"""
+import os
+import tempfile
+import time
+
+from MigrationTools import cdm_metadata_tsv, cdm_metadata_xml, CDM_Metadata
+from benchmarks.generator import write_export
+
+SIZES = (1000, 10000, 100000)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("{:>8} {:>8} {:>12} {:>16}".format("objects", "parts", "join (s)", "per object (us)"))
+        for size in SIZES:
+            xml_file = os.path.join(tmp_dir, "{}.xml".format(size))
+            tsv_file = os.path.join(tmp_dir, "{}.tsv".format(size))
+            summary = write_export(xml_file, tsv_file, size)
+            xml_metadata = cdm_metadata_xml(xml_file)
+            tsv_metadata = cdm_metadata_tsv(tsv_file)
+
+            started = time.perf_counter()
+            CDM_Metadata.create_full(xml_metadata=xml_metadata, tsv_metadata=tsv_metadata)
+            elapsed = time.perf_counter() - started
+            print("{:>8} {:>8} {:>12.3f} {:>16.2f}".format(summary.objects, summary.parts, elapsed,
+                                                           elapsed / summary.objects * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Compares time to the first record, total time and peak memory of iterating over a joined collection with and
+without lazy=True.
+
+Usage::
+
+    python -m benchmarks.bench_lazy [parts]
+
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from MigrationTools import CDM_Metadata
+from benchmarks.generator import write_export
+
+
+def run(xml_file, tsv_file, lazy):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first = None
+    for _ in CDM_Metadata(xml_file, tsv_file, lazy=lazy):
+        if first is None:
+            first = time.perf_counter() - started
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        tsv_file = os.path.join(tmp_dir, "export.tsv")
+        summary = write_export(xml_file, tsv_file, parts)
+        print("{} objects, {} parts".format(summary.objects, summary.parts))
+        print("{:>6} {:>16} {:>12} {:>12}".format("lazy", "first (s)", "total (s)", "peak (MiB)"))
+        for lazy in (False, True):
+            first, total, peak = run(xml_file, tsv_file, lazy)
+            print("{:>6} {:>16.4f} {:>12.3f} {:>12.1f}".format(str(lazy), first, total, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Times joining a generated export with the hash join, in memory and lazily, and with the merge join, and measures the
+peak memory of the process for each. Every join runs in a process of its own so the peaks don't affect each other.
+
+Usage::
+
+    python -m benchmarks.bench_merge_join [parts]
+
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from MigrationTools import CDM_Metadata
+from benchmarks.generator import write_export
+
+JOINS = {
+    "in memory": {},
+    "lazy hash": {"lazy": True},
+    "merge": {"merge_join": True},
+}
+
+
+def child(xml_file, tsv_file, join):
+    started = time.perf_counter()
+    parts = sum(1 for _ in CDM_Metadata(xml_file, tsv_file, **JOINS[join]))
+    total = time.perf_counter() - started
+    print(parts, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def run(xml_file, tsv_file, join):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_merge_join", "--child", xml_file, tsv_file, join],
+                            check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    parts, total, peak = output.split()
+    return int(parts), float(total), int(peak)
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+        return
+
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        tsv_file = os.path.join(tmp_dir, "export.tsv")
+        write_export(xml_file, tsv_file, parts)
+        print("{} parts".format(parts))
+        print("{:>10} {:>8} {:>10} {:>11}".format("join", "parts", "total (s)", "peak (MiB)"))
+        for join in JOINS:
+            parts, total, peak = run(xml_file, tsv_file, join)
+            print("{:>10} {:>8} {:>10.2f} {:>11.1f}".format(join, parts, total, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
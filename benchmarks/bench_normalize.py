@@ -0,0 +1,57 @@
+"""Times loading a generated XML export and measures the memory its records use, cleaning up every value with the
+pattern compiled on each call, the way it used to work, and with the cached and interned cleanup_string.
+
+Usage::
+
+    python -m benchmarks.bench_normalize [parts]
+
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+from MigrationTools import MetadataReader, cdm_metadata_xml
+from benchmarks.generator import write_export
+
+
+def cleanup_uncached(text):
+    p = re.compile(MetadataReader.REMOVE_WSPACE_PATTERN)
+    return p.sub(" ", text).strip()
+
+
+def run(xml_file):
+    # Timed without tracemalloc, which slows down every allocation
+    MetadataReader._cleanup_string.cache_clear()
+    started = time.perf_counter()
+    cdm_metadata_xml(xml_file)
+    total = time.perf_counter() - started
+
+    MetadataReader._cleanup_string.cache_clear()
+    tracemalloc.start()
+    metadata = cdm_metadata_xml(xml_file)
+    kept = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(metadata), total, kept
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        write_export(xml_file, os.path.join(tmp_dir, "export.tsv"), parts)
+        print("{} parts".format(parts))
+        print("{:>10} {:>8} {:>12} {:>12}".format("cleanup", "records", "load (s)", "kept (MiB)"))
+        with mock.patch.object(MetadataReader, "_cleanup_string", cleanup_uncached):
+            cleanup_uncached.cache_clear = lambda: None
+            records, total, kept = run(xml_file)
+        print("{:>10} {:>8} {:>12.3f} {:>12.1f}".format("uncached", records, total, kept / 1024 / 1024))
+        records, total, kept = run(xml_file)
+        print("{:>10} {:>8} {:>12.3f} {:>12.1f}".format("interned", records, total, kept / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Times iterating over the pages of a joined collection and keeping them, with a merged dict copied for every page,
+the way it used to work, and with page views that share their object's fields.
+
+Usage::
+
+    python -m benchmarks.bench_page_views [parts]
+
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from MigrationTools import CDM_Metadata
+from benchmarks.generator import write_export
+
+
+def iter_copied(metadata):
+    for i, object_record in enumerate(metadata.iter_full()):
+        object_record['group_id'] = i
+        yield object_record
+        for page_number, item in enumerate(object_record.item_level):
+            santized = {k: ";".join(v) for k, v in item.items()}
+            object_info = dict(object_record.object_level)
+            for key in santized.keys():
+                if key in object_info.keys():
+                    del object_info[key]
+            matching = metadata._lookup(int(santized['pageptr']))
+            item = {**object_info, **santized, **matching}
+            item['group_id'] = i
+            item['XML_order'] = page_number + 1
+            yield item
+
+
+def run(parts):
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = list(parts)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(kept), total, peak
+
+
+def main():
+    part_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        tsv_file = os.path.join(tmp_dir, "export.tsv")
+        summary = write_export(xml_file, tsv_file, part_count, compound_ratio=1, max_pages=20)
+        metadata = CDM_Metadata(xml_file, tsv_file)
+        print("{} objects, {} pages".format(summary.objects, summary.pages))
+        print("{:>8} {:>8} {:>12} {:>12}".format("pages", "parts", "total (s)", "peak (MiB)"))
+        for name, parts in (("copied", iter_copied(metadata)), ("views", iter(metadata))):
+            count, total, peak = run(parts)
+            print("{:>8} {:>8} {:>12.3f} {:>12.1f}".format(name, count, total, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Times repeated queries of a TSV export with a Python loop over every record and with where(), which indexes the
+queried field the first time.
+
+Usage::
+
+    python -m benchmarks.bench_query [rows]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+from MigrationTools import cdm_metadata_tsv
+from MigrationTools.Query import Prefix
+from benchmarks.generator import FORENAMES, SURNAMES, write_tsv
+
+QUERIES = 200
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tsv_file = os.path.join(tmp_dir, "export.tsv")
+        write_tsv(tsv_file, rows)
+        metadata = cdm_metadata_tsv(tsv_file)
+        creators = ["{}, {}".format(SURNAMES[i % len(SURNAMES)], FORENAMES[i % len(FORENAMES)]) for i in range(QUERIES)]
+        dates = [str(1800 + i % 10) for i in range(QUERIES)]
+
+        print("{} rows, {} queries".format(rows, QUERIES))
+        print("{:>10} {:>12} {:>12}".format("", "loop (s)", "where (s)"))
+        for name, loop, where in (
+                ("equal", lambda value: [r for r in metadata if r["Creator"] == value],
+                 lambda value: metadata.where(Creator=value), ),
+                ("prefix", lambda value: [r for r in metadata if r["Date"].startswith(value)],
+                 lambda value: metadata.where(Date=Prefix(value)))):
+            values = creators if name == "equal" else dates
+            started = time.perf_counter()
+            for value in values:
+                loop(value)
+            looped = time.perf_counter() - started
+            started = time.perf_counter()
+            for value in values:
+                where(value)
+            queried = time.perf_counter() - started
+            print("{:>10} {:>12.3f} {:>12.3f}".format(name, looped, queried))
+
+
+if __name__ == '__main__':
+    main()
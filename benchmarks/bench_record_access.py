@@ -0,0 +1,49 @@
+"""Times reading every field of a FullRecord with the merged view rebuilt on every access, the way it used to work,
+and with each field looked up where it is.
+
+Usage::
+
+    python -m benchmarks.bench_record_access
+
+"""
+import timeit
+
+from MigrationTools.MetadataReader import FullRecord, Record
+
+FIELD_COUNTS = (10, 40, 160)
+PAGES = 10
+
+
+def make_record(fields):
+    object_level = Record({"field {}".format(i): ["value {}".format(i)] for i in range(fields)})
+    pages = [{"page field {}".format(i): ["page {} value {}".format(page, i)] for i in range(fields)}
+             for page in range(PAGES)]
+    return FullRecord(object_level, pages)
+
+
+def merged(record):
+    pages = {k: ";".join(v) for page in record.item_level for k, v in page.items()}
+    return {**record.object_level, **pages, **record.additional_info}
+
+
+def read_merged(record):
+    for key in merged(record):
+        merged(record)[key]
+
+
+def read_layered(record):
+    for key in record:
+        record[key]
+
+
+def main():
+    print("{:>8} {:>14} {:>14} {:>10}".format("fields", "merged (ms)", "layered (ms)", "speedup"))
+    for fields in FIELD_COUNTS:
+        record = make_record(fields)
+        rebuilt = min(timeit.repeat(lambda: read_merged(record), number=1, repeat=5))
+        layered = min(timeit.repeat(lambda: read_layered(record), number=1, repeat=5))
+        print("{:>8} {:>14.3f} {:>14.3f} {:>10.1f}".format(fields, rebuilt * 1000, layered * 1000, rebuilt / layered))
+
+
+if __name__ == '__main__':
+    main()
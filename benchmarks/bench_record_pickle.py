@@ -0,0 +1,81 @@
+"""Measures the memory used per Record and the size and time of pickling records.
+
+"unslotted" is a Record subclass that has a __dict__ again and is pickled the default way, like Record was before it
+used __slots__.
+
+Usage::
+
+    python -m benchmarks.bench_record_pickle [parts]
+
+"""
+import copyreg
+import gc
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from MigrationTools import cdm_metadata_xml
+from MigrationTools.MetadataReader import Record
+from MigrationTools.RecordBatch import RecordBatch
+from benchmarks.generator import write_xml
+
+
+class UnslottedRecord(Record):
+    def __reduce_ex__(self, protocol):
+        # Same as the default for an object with a __dict__, which pickles every attribute including the caches
+        slots = {name: getattr(self, name) for name in Record.__slots__}
+        return copyreg.__newobj__, (type(self),), (self.__dict__, slots)
+
+
+def instance_memory(cls, records):
+    gc.collect()
+    tracemalloc.start()
+    copies = [cls(record.data) for record in records]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copies
+    return size / len(records)
+
+
+def pickled(payloads):
+    started = time.perf_counter()
+    size = sum(len(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)) for payload in payloads)
+    return size, time.perf_counter() - started
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        write_xml(xml_file, parts)
+        records = list(cdm_metadata_xml(xml_file))
+
+    print("{} records".format(len(records)))
+    print("Instance overhead per record (bytes, not counting data)")
+    print("  unslotted: {:.1f}".format(instance_memory(UnslottedRecord, records)))
+    print("  slotted:   {:.1f}".format(instance_memory(Record, records)))
+
+    unslotted = []
+    for record in records:
+        copy = UnslottedRecord(record.data)
+        copy._pages = record._pages
+        len(copy)
+        unslotted.append(copy)
+    for record in records:
+        len(record)
+
+    print("{:<32} {:>14} {:>10}".format("pickled as", "size (bytes)", "time (s)"))
+    for name, payloads in (("unslotted, one at a time", unslotted),
+                           ("slotted, one at a time", records),
+                           ("unslotted, one list", [unslotted]),
+                           ("slotted, one list", [records]),
+                           ("RecordBatch", [RecordBatch(records)])):
+        size, elapsed = pickled(payloads)
+        print("{:<32} {:>14} {:>10.3f}".format(name, size, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Times joining a generated export in memory and through temporary files with a memory budget, and measures the peak
+memory of the process for each. Every join runs in a process of its own so the peaks don't affect each other.
+
+Usage::
+
+    python -m benchmarks.bench_spill_join [parts] [budget in MiB]
+
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from MigrationTools import CDM_Metadata
+from benchmarks.generator import write_export
+
+
+def child(xml_file, tsv_file, budget):
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    started = time.perf_counter()
+    metadata = CDM_Metadata(xml_file, tsv_file, memory_budget=budget)
+    parts = sum(1 for _ in metadata)
+    total = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(parts, metadata.spill_partitions or 0, total, baseline, peak)
+
+
+def run(xml_file, tsv_file, budget):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_spill_join", "--child", xml_file, tsv_file,
+                             str(budget)], check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    parts, partitions, total, baseline, peak = output.split()
+    return int(parts), int(partitions), float(total), int(baseline), int(peak)
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        budget = int(sys.argv[4])
+        child(sys.argv[2], sys.argv[3], budget if budget > 0 else None)
+        return
+
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    budget = int(sys.argv[2]) * 1024 * 1024 if len(sys.argv) > 2 else 64 * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        tsv_file = os.path.join(tmp_dir, "export.tsv")
+        write_export(xml_file, tsv_file, parts)
+        print("{} parts, budget {} MiB".format(parts, budget // 1024 // 1024))
+        print("{:>10} {:>8} {:>11} {:>10} {:>15} {:>11}".format(
+            "join", "parts", "partitions", "total (s)", "baseline (MiB)", "peak (MiB)"))
+        for name, join_budget in (("in memory", 0), ("spilled", budget)):
+            parts, partitions, total, baseline, peak = run(xml_file, tsv_file, join_budget)
+            print("{:>10} {:>8} {:>11} {:>10.2f} {:>15.1f} {:>11.1f}".format(
+                name, parts, partitions, total, baseline / 1024 / 1024, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Times looking up every record of a TSV export by its CONTENTdm number.
+
+With the CONTENTdm number index the time per record should stay about the same as the number of rows grows, meaning
+the total time grows linearly.
+
+Usage::
+
+    python -m benchmarks.bench_tsv_lookup
+
+"""
+import os
+import tempfile
+import timeit
+
+from MigrationTools import cdm_metadata_tsv
+from benchmarks.generator import write_tsv
+
+SIZES = (1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def lookup_all(metadata):
+    for record in metadata:
+        metadata.get_record(record['CONTENTdm number'])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("{:>8} {:>12} {:>16}".format("rows", "total (s)", "per row (us)"))
+        for size in SIZES:
+            tsv_file = os.path.join(tmp_dir, "{}.tsv".format(size))
+            write_tsv(tsv_file, size)
+            metadata = cdm_metadata_tsv(tsv_file)
+            total = min(timeit.repeat(lambda: lookup_all(metadata), number=1, repeat=3))
+            print("{:>8} {:>12.4f} {:>16.3f}".format(size, total, total / size * 1e6))
+
+
+if __name__ == '__main__':
+    main()
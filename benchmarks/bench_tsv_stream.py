@@ -0,0 +1,41 @@
+"""Compares peak memory of reading every row of a TSV export with and without stream=True.
+
+When streaming, peak memory should stay flat as the number of rows grows.
+
+Usage::
+
+    python -m benchmarks.bench_tsv_stream
+
+"""
+import os
+import tempfile
+import tracemalloc
+
+from MigrationTools import cdm_metadata_tsv
+from benchmarks.generator import write_tsv
+
+SIZES = (10000, 20000, 40000, 80000)
+
+
+def peak_memory(tsv_file, stream):
+    tracemalloc.start()
+    for _ in cdm_metadata_tsv(tsv_file, stream=stream):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("{:>8} {:>16} {:>16}".format("rows", "loaded (KiB)", "stream (KiB)"))
+        for size in SIZES:
+            tsv_file = os.path.join(tmp_dir, "{}.tsv".format(size))
+            write_tsv(tsv_file, size)
+            print("{:>8} {:>16.1f} {:>16.1f}".format(size,
+                                                     peak_memory(tsv_file, stream=False) / 1024,
+                                                     peak_memory(tsv_file, stream=True) / 1024))
+
+
+if __name__ == '__main__':
+    main()
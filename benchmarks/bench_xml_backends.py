@@ -0,0 +1,50 @@
+"""Times loading a generated XML export with each parser backend that's installed, and checks that they all give the
+same records.
+
+Usage::
+
+    python -m benchmarks.bench_xml_backends [parts]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+from MigrationTools import MetadataReader, cdm_metadata_xml
+from MigrationTools.XmlBackends import available_backends
+from benchmarks.generator import write_export
+
+
+def run(xml_file, backend):
+    MetadataReader._cleanup_string.cache_clear()
+    started = time.perf_counter()
+    metadata = cdm_metadata_xml(xml_file, backend=backend)
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cdm_metadata_xml.count_parts(xml_file, backend)
+    count = time.perf_counter() - started
+    return metadata, load, count
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        write_export(xml_file, os.path.join(tmp_dir, "export.tsv"), parts)
+        print("{} parts".format(parts))
+        print("{:>8} {:>8} {:>12} {:>12}".format("backend", "records", "load (s)", "count (s)"))
+        expected = None
+        for backend in available_backends():
+            metadata, load, count = run(xml_file, backend)
+            print("{:>8} {:>8} {:>12.3f} {:>12.3f}".format(backend, len(metadata), load, count))
+            records = [(dict(record.data), record.pages) for record in metadata.records]
+            if expected is None:
+                expected = records
+            elif records != expected:
+                raise AssertionError("{} gave different records".format(backend))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Compares peak memory of reading the records of a XML export from a whole element tree and one at a time with
+cdm_metadata_xml.iter_file().
+
+When reading one record at a time, peak memory should stay flat as the number of records grows.
+
+Usage::
+
+    python -m benchmarks.bench_xml_iterparse
+
+"""
+import os
+import tempfile
+import tracemalloc
+from xml.etree import ElementTree as ET
+
+from MigrationTools import cdm_metadata_xml
+from benchmarks.generator import write_xml
+
+SIZES = (2000, 4000, 8000, 16000)
+
+
+def read_tree(xml_file):
+    root = ET.parse(xml_file).getroot()
+    field_names = cdm_metadata_xml.get_field_names(root)
+    for element in root:
+        cdm_metadata_xml.build_record(element, field_names)
+
+
+def read_streaming(xml_file):
+    for _ in cdm_metadata_xml.iter_file(xml_file):
+        pass
+
+
+def peak_memory(function, xml_file):
+    tracemalloc.start()
+    function(xml_file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("{:>8} {:>8} {:>16} {:>18}".format("parts", "records", "tree (KiB)", "iter_file (KiB)"))
+        for size in SIZES:
+            xml_file = os.path.join(tmp_dir, "{}.xml".format(size))
+            summary = write_xml(xml_file, size)
+            print("{:>8} {:>8} {:>16.1f} {:>18.1f}".format(size, summary.objects,
+                                                           peak_memory(read_tree, xml_file) / 1024,
+                                                           peak_memory(read_streaming, xml_file) / 1024))
+
+
+if __name__ == '__main__':
+    main()
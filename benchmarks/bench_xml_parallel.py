@@ -0,0 +1,37 @@
+"""Times loading a XML export with 1, 2, 4 and 8 worker processes.
+
+Usage::
+
+    python -m benchmarks.bench_xml_parallel [parts]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+from MigrationTools import cdm_metadata_xml
+from benchmarks.generator import write_xml
+
+WORKERS = (1, 2, 4, 8)
+
+
+def main():
+    parts = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_file = os.path.join(tmp_dir, "export.xml")
+        summary = write_xml(xml_file, parts)
+        print("{} records, {} parts, {} CPUs".format(summary.objects, parts, os.cpu_count()))
+        print("{:>8} {:>12} {:>10}".format("workers", "time (s)", "speedup"))
+        baseline = None
+        for workers in WORKERS:
+            started = time.perf_counter()
+            cdm_metadata_xml(xml_file, workers=workers)
+            elapsed = time.perf_counter() - started
+            if baseline is None:
+                baseline = elapsed
+            print("{:>8} {:>12.3f} {:>10.2f}".format(workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""Deterministic generator of realistic CONTENTdm TSV and XML export pairs, used by every benchmark.
+
+The same number of parts and seed always gives the same files. Parts are objects plus pages, the same as the rows of
+the TSV export. Some objects are compound objects with pages directly in ``structure/page`` and some have them grouped
+in ``structure/node/page``. Pages are numbered before their object and come before it in the TSV export, like
+CONTENTdm exports them.
+
+Usage::
+
+    python -m benchmarks.generator output_directory [parts] [seed]
+
+"""
+import contextlib
+import csv
+import os
+import random
+import sys
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+RIGHTS = "Please email digicc@library.illinois.edu if you have comments or questions relating to this record. " \
+         "Rights to this item are owned by the University of Illinois at Urbana-Champaign."
+
+# TSV column and the XML element it's exported as
+FIELDS = (
+    ("Title", "title"),
+    ("Creator", "creator"),
+    ("Subject", "subject"),
+    ("Description", "description"),
+    ("Date", "date"),
+    ("Type", "type"),
+    ("Format", "format"),
+    ("Rights", "rights"),
+    ("Collection", "isPartOf"),
+    ("Date created", "cdmcreated"),
+    ("Date modified", "cdmmodified"),
+    ("Reference URL", "viewerURL"),
+    ("CONTENTdm number", "cdmid"),
+    ("CONTENTdm file name", "cdmfile"),
+    ("CONTENTdm file path", "cdmpath"),
+)
+TSV_FIELDS = tuple(tsv for tsv, _ in FIELDS)
+
+COLLECTION = "Maps of Africa to 1900"
+PLACES = ("Congo", "Niger", "Zambezi", "Nile", "Kalahari", "Sahara", "Lake Chad", "Lake Victoria", "Timbuktu",
+          "Zanzibar", "Cape Colony", "Abyssinia", "Senegal", "Gold Coast", "Angola", "Mozambique")
+KINDS = ("Map of", "Route from", "Survey of", "Sketch of", "Chart of", "Plan of")
+SURNAMES = ("Baumann", "Chavanne", "Stanley", "Livingstone", "Barth", "Burton", "Speke", "Grenfell", "Schweinfurth",
+            "Nachtigal", "Rohlfs", "Junker", "Lugard", "Thomson", "Cameron", "Wissmann")
+FORENAMES = ("Oscar", "Josef", "Henry", "David", "Heinrich", "Richard", "John", "George", "Georg", "Gustav")
+SUBJECTS = tuple("{}--{}".format(place, topic) for place in PLACES
+                 for topic in ("Maps", "Navigation", "Description and travel", "Boundaries", "Discovery and exploration"))
+
+ExportObject = namedtuple("ExportObject", ["number", "values", "pages", "nodes"])
+ExportPage = namedtuple("ExportPage", ["number", "title", "values"])
+ExportSummary = namedtuple("ExportSummary", ["objects", "pages", "parts", "numbers"])
+
+
+def _date(rng, first_year, last_year)->str:
+    return "{}-{:02d}-{:02d}".format(rng.randint(first_year, last_year), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def _object_values(rng, number, compound)->dict:
+    place = rng.choice(PLACES)
+    year = rng.randint(1800, 1900)
+    description = "{} showing rivers, towns and routes.".format(place)
+    if rng.random() < 0.2:
+        # Some cells have line breaks, which are quoted in the TSV export
+        description += "\nInset: {}.".format(rng.choice(PLACES))
+    file_name = "{}.cpd".format(number) if compound else "{}.jp2".format(number)
+    return {
+        "Title": "{} {}, {}".format(rng.choice(KINDS), place, year),
+        "Creator": "{}, {}".format(rng.choice(SURNAMES), rng.choice(FORENAMES)),
+        "Subject": "; ".join(rng.sample(SUBJECTS, rng.randint(1, 4))),
+        "Description": description,
+        "Date": str(year),
+        "Type": "Maps",
+        "Format": "image/jp2",
+        "Rights": RIGHTS,
+        "Collection": COLLECTION,
+        "Date created": _date(rng, 2010, 2013),
+        "Date modified": _date(rng, 2013, 2018),
+        "Reference URL": "http://imagesearchnew.library.illinois.edu/cdm/ref/collection/africanmaps/id/{}".format(
+            number),
+        "CONTENTdm number": str(number),
+        "CONTENTdm file name": file_name,
+        "CONTENTdm file path": "/africanmaps/image/{}".format(file_name),
+    }
+
+
+def iter_export(parts, seed=0, compound_ratio=0.1, node_ratio=0.3, max_pages=12):
+    """Generator function that makes the objects of an export with the given number of parts.
+
+    :param parts: number of objects and pages together
+    :param seed: seed for the random values
+    :param compound_ratio: share of objects that have pages
+    :param node_ratio: share of compound objects that group their pages into nodes
+    :param max_pages: most pages a compound object can have
+    :yields: ExportObject
+    """
+    rng = random.Random(seed)
+    number = 0
+    made = 0
+    while made < parts:
+        remaining = parts - made
+        page_count = 0
+        if remaining > 2 and rng.random() < compound_ratio:
+            page_count = min(rng.randint(2, max_pages), remaining - 1)
+        nodes = page_count > 0 and rng.random() < node_ratio
+
+        pages = []
+        for page in range(page_count):
+            values = {
+                "Title": "Sheet {}".format(page + 1),
+                "Rights": RIGHTS,
+                "Date modified": _date(rng, 2013, 2018),
+                "CONTENTdm file name": "{}.jp2".format(number),
+                "CONTENTdm file path": "/africanmaps/image/{}.jp2".format(number),
+            }
+            pages.append(ExportPage(number, "Sheet {}".format(page + 1), values))
+            number += 1
+
+        yield ExportObject(number, _object_values(rng, number, bool(pages)), pages, nodes)
+        number += 1
+        made += 1 + page_count
+
+
+def _write_page(f, page: ExportPage, indent):
+    f.write("{0}<page>\n"
+            "{0}    <pagetitle>{1}</pagetitle>\n"
+            "{0}    <pageptr>{2}</pageptr>\n"
+            "{0}    <pagemetadata>\n"
+            "{0}        <title>{3}</title>\n"
+            "{0}        <rights>{4}</rights>\n"
+            "{0}        <cdmmodified>{5}</cdmmodified>\n"
+            "{0}        <cdmfile>{6}</cdmfile>\n"
+            "{0}    </pagemetadata>\n"
+            "{0}</page>\n".format(indent, escape(page.title), page.number, escape(page.values["Title"]),
+                                  escape(RIGHTS), page.values["Date modified"], page.values["CONTENTdm file name"]))
+
+
+def _write_record(f, export_object: ExportObject):
+    f.write("    <record>\n")
+    for tsv_field, element in FIELDS:
+        f.write("        <{0}>{1}</{0}>\n".format(element, escape(export_object.values[tsv_field])))
+    if not export_object.pages:
+        f.write("        <structure>http://imagesearch.library.illinois.edu/cgi-bin/showfile.exe?"
+                "CISOROOT=/africanmaps&amp;CISOPTR={}</structure>\n".format(export_object.number))
+    elif export_object.nodes:
+        f.write("        <structure>\n")
+        half = (len(export_object.pages) + 1) // 2
+        for node, pages in enumerate((export_object.pages[:half], export_object.pages[half:])):
+            f.write("            <node>\n"
+                    "                <nodetitle>Part {}</nodetitle>\n".format(node + 1))
+            for page in pages:
+                _write_page(f, page, " " * 16)
+            f.write("            </node>\n")
+        f.write("        </structure>\n")
+    else:
+        f.write("        <structure>\n")
+        for page in export_object.pages:
+            _write_page(f, page, " " * 12)
+        f.write("        </structure>\n")
+    f.write("    </record>\n")
+
+
+def _tsv_rows(export_object: ExportObject):
+    for page in export_object.pages:
+        row = dict(export_object.values, **page.values)
+        row["CONTENTdm number"] = str(page.number)
+        yield [row[field] for field in TSV_FIELDS]
+    yield [export_object.values[field] for field in TSV_FIELDS]
+
+
+def write_export(xml_file, tsv_file, parts, seed=0, **options)->ExportSummary:
+    """Write a XML export and the TSV export that matches it.
+
+    :param xml_file: XML file to write, or None to only write the TSV export
+    :param tsv_file: TSV file to write, or None to only write the XML export
+    :param parts: number of objects and pages together
+    :param seed: seed for the random values
+    :param options: passed on to :func:`iter_export`
+    :returns: ExportSummary -- number of objects, pages and parts, and the CONTENTdm number of every part
+    """
+    objects = 0
+    pages = 0
+    numbers = []
+    with contextlib.ExitStack() as stack:
+        writer = None
+        if tsv_file is not None:
+            writer = csv.writer(stack.enter_context(open(tsv_file, "w", encoding="utf-8", newline="")),
+                                dialect="excel-tab")
+            writer.writerow(TSV_FIELDS)
+        xml = None
+        if xml_file is not None:
+            xml = stack.enter_context(open(xml_file, "w", encoding="utf-8"))
+            xml.write('<?xml version="1.0" encoding="utf-8"?>\n<metadata>\n')
+        for export_object in iter_export(parts, seed, **options):
+            if writer is not None:
+                writer.writerows(_tsv_rows(export_object))
+            if xml is not None:
+                _write_record(xml, export_object)
+            numbers.extend(page.number for page in export_object.pages)
+            numbers.append(export_object.number)
+            objects += 1
+            pages += len(export_object.pages)
+        if xml is not None:
+            xml.write("</metadata>\n")
+    return ExportSummary(objects, pages, objects + pages, numbers)
+
+
+def write_tsv(tsv_file, parts, seed=0, **options)->ExportSummary:
+    """Write only the TSV export of :func:`write_export`."""
+    return write_export(None, tsv_file, parts, seed, **options)
+
+
+def write_xml(xml_file, parts, seed=0, **options)->ExportSummary:
+    """Write only the XML export of :func:`write_export`."""
+    return write_export(xml_file, None, parts, seed, **options)
+
+
+def write_file_tree(directory, file_names, per_directory=500):
+    """Make an empty file for each file name, spread over sub directories the way a migration source tree is.
+
+    :param directory: where to make the files
+    :param file_names: names of the files
+    :param per_directory: most files in a single directory
+    """
+    for i, file_name in enumerate(file_names):
+        sub_directory = os.path.join(directory, "batch{:04d}".format(i // per_directory))
+        if i % per_directory == 0:
+            os.makedirs(sub_directory, exist_ok=True)
+        open(os.path.join(sub_directory, file_name), "w").close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    directory = sys.argv[1]
+    parts = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    os.makedirs(directory, exist_ok=True)
+    summary = write_export(os.path.join(directory, "export.xml"), os.path.join(directory, "export.tsv"), parts, seed)
+    print("{} objects, {} pages, {} parts".format(summary.objects, summary.pages, summary.parts))
+
+
+if __name__ == '__main__':
+    main()
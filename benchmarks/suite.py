@@ -0,0 +1,143 @@
+"""Benchmark suite that times loading, joining, iterating, looking up records and finding files on generated exports
+of increasing size, and writes the results as JSON so they can be compared between releases.
+
+Usage::
+
+    python -m benchmarks.suite [--sizes 1000 10000 100000] [--seed 0] [--repeat 3] [--output results.json]
+
+Sizes are in parts, objects plus pages. Going up to 1000000 parts takes a while and a few GB of memory.
+
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from MigrationTools import CDM_Metadata, CachedFinder, cdm_metadata_tsv, cdm_metadata_xml
+from benchmarks.generator import write_export, write_file_tree
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+LOOKUPS = 1000
+# Making a file for every part of the largest exports would take longer than the benchmarks themselves
+MAX_TREE_FILES = 20000
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+        return version("MigrationTools")
+    except Exception:
+        return None
+
+
+def measure(function, repeat):
+    """Run function repeat times and keep the fastest.
+
+    :returns: dict -- wall clock and CPU seconds of the fastest run
+    """
+    best = None
+    for _ in range(repeat):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        function()
+        run = {"wall_seconds": time.perf_counter() - wall, "cpu_seconds": time.process_time() - cpu}
+        if best is None or run["wall_seconds"] < best["wall_seconds"]:
+            best = run
+    return best
+
+
+def lookup_records(metadata, numbers):
+    for number in numbers:
+        metadata.get_record(number)
+
+
+def find_files(finder, file_names):
+    for file_name in file_names:
+        finder.find_file(file_name)
+
+
+def run_size(tmp_dir, parts, seed, repeat):
+    """Time every case for an export of the given number of parts.
+
+    :returns: list of dicts -- one result for each case
+    """
+    xml_file = os.path.join(tmp_dir, "export{}.xml".format(parts))
+    tsv_file = os.path.join(tmp_dir, "export{}.tsv".format(parts))
+    summary = write_export(xml_file, tsv_file, parts, seed)
+    rng = random.Random(seed)
+    numbers = rng.sample(summary.numbers, min(LOOKUPS, len(summary.numbers)))
+
+    tsv_metadata = cdm_metadata_tsv(tsv_file)
+    joined = CDM_Metadata(xml_file, tsv_file)
+
+    tree = os.path.join(tmp_dir, "files{}".format(parts))
+    tree_files = ["{}.jp2".format(number) for number in summary.numbers[:MAX_TREE_FILES]]
+    write_file_tree(tree, tree_files)
+    finder = CachedFinder(tree)
+    wanted = rng.sample(tree_files, min(LOOKUPS // 10, len(tree_files)))
+
+    cases = (
+        ("load_tsv", parts, lambda: cdm_metadata_tsv(tsv_file)),
+        ("load_xml", parts, lambda: cdm_metadata_xml(xml_file)),
+        ("join", parts, lambda: CDM_Metadata(xml_file, tsv_file)),
+        ("iterate", parts, lambda: sum(1 for _ in joined)),
+        ("get_record", len(numbers), lambda: lookup_records(tsv_metadata, numbers)),
+        ("finder_map", len(tree_files), lambda: CachedFinder(tree)),
+        ("finder_lookup", len(wanted), lambda: find_files(finder, wanted)),
+    )
+    results = []
+    for case, operations, function in cases:
+        result = {"case": case, "parts": parts, "objects": summary.objects, "pages": summary.pages,
+                  "operations": operations}
+        result.update(measure(function, repeat))
+        result["microseconds_per_operation"] = result["wall_seconds"] / max(1, operations) * 1000000
+        results.append(result)
+        print("{:>14} {:>9} parts {:>10.4f}s".format(case, parts, result["wall_seconds"]), file=sys.stderr)
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, seed=0, repeat=1)->dict:
+    """Run the suite.
+
+    :returns: dict -- information about the machine and version, and the results of each case for each size
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for parts in sizes:
+            results.extend(run_size(tmp_dir, parts, seed, repeat))
+    return {
+        "results_version": RESULTS_VERSION,
+        "package_version": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="export sizes in parts")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated exports")
+    parser.add_argument("--repeat", type=int, default=1, help="times to run each case, keeping the fastest")
+    parser.add_argument("--output", help="file to write the JSON results to instead of standard output")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
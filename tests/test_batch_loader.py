@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata
+from MigrationTools.BatchLoader import load_collections
+from MigrationTools.MetadataReader import Items, RecordMismatch
+
+test_file1_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+test_file_missing_tsv = os.path.join(os.path.dirname(__file__), "exportMissing.tsv")
+
+
+@pytest.fixture()
+def collections():
+    return [Items("joined", (test_file_xml, test_file_tsv)),
+            Items("missing", (test_file_xml, test_file_missing_tsv)),
+            (test_file1_tsv,)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_collections(collections, workers):
+    loaded = {collection.name: collection for collection in load_collections(collections, workers=workers)}
+    assert sorted(loaded) == ["joined", "missing", "test"]
+
+    joined = loaded["joined"]
+    assert joined.error is None
+    assert [dict(record) for record in joined.records] == \
+        [dict(record) for record in CDM_Metadata(test_file_xml, test_file_tsv)]
+    assert len(loaded["test"].records) == len(CDM_Metadata(test_file1_tsv))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_collections_error(collections, workers):
+    loaded = {collection.name: collection for collection in load_collections(collections, workers=workers)}
+    missing = loaded["missing"]
+    assert missing.records is None
+    assert isinstance(missing.error, RecordMismatch)
+    assert missing.files == (test_file_xml, test_file_missing_tsv)
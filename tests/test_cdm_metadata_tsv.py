@@ -110,4 +110,76 @@ def test_contains(CDMdata):
 def test_iter_forloop(CDMdata):
     for i, record in enumerate(CDMdata):
         assert isinstance(record, dict)
-        assert i < len(CDMdata), "The class is try to pull more records than exists"
\ No newline at end of file
+        assert i < len(CDMdata), "The class is try to pull more records than exists"
+
+def test_get_invalid_record(CDMdata):
+    with pytest.raises(IndexError):
+        CDMdata.get_record(1)
+
+
+def test_contains_missing(CDMdata):
+    assert 1 not in CDMdata
+    assert "44" in CDMdata
+
+
+def test_add_record_indexed(CDMdata):
+    new_record = {field: "" for field in test_field}
+    new_record['CONTENTdm number'] = "9999"
+    new_record['Title'] = "Added"
+    CDMdata.add_record(new_record)
+    assert 9999 in CDMdata
+    assert CDMdata.get_record(9999)['Title'] == "Added"
+    assert len(CDMdata) == 27
+
+
+@pytest.fixture()
+def CDMdata_stream():
+    return cdm_metadata_tsv(test_file, stream=True)
+
+
+def test_stream_matches_loaded(CDMdata, CDMdata_stream):
+    assert list(CDMdata_stream) == list(CDMdata)
+    assert len(CDMdata_stream) == len(CDMdata)
+
+
+def test_stream_doesnt_load_records(CDMdata_stream):
+    assert CDMdata_stream.records is None
+
+
+def test_stream_fields(CDMdata_stream):
+    assert CDMdata_stream.fields == sorted(test_field)
+    assert CDMdata_stream.has_field("Title")
+    assert CDMdata_stream.has_field("foo") is False
+
+
+def test_stream_get_record(CDMdata_stream):
+    assert CDMdata_stream.get_record(43)['Title'] == "Map with tributaries to Congo River, Mpozo River"
+    assert 44 in CDMdata_stream
+    with pytest.raises(IndexError):
+        CDMdata_stream.get_record(1)
+
+
+def test_iter_file():
+    titles = [record['Title'] for record in cdm_metadata_tsv.iter_file(test_file)]
+    assert len(titles) == 26
+
+
+@pytest.mark.parametrize("options", [{}, {"stream": True}, {"columnar": True}])
+def test_selected_fields(options):
+    limited = cdm_metadata_tsv(test_file, fields=["Title", "Creator"], **options)
+    assert limited.fields == ["CONTENTdm number", "Creator", "Title"]
+    assert limited.has_field("Date") is False
+    record = limited.get_record(43)
+    assert dict(record) == {"Title": "Map with tributaries to Congo River, Mpozo River",
+                            "Creator": "Brinkman, C.L.",
+                            "CONTENTdm number": "43"}
+    assert len(limited) == 26
+
+
+def test_selected_fields_missing():
+    with pytest.raises(KeyError):
+        cdm_metadata_tsv(test_file, fields=["spam"])
+
+
+def test_stream_with_fields(CDMdata, CDMdata_stream):
+    assert list(CDMdata_stream.with_fields("Title", "Creator")) == list(CDMdata.with_fields("Title", "Creator"))
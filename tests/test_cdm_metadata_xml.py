@@ -1,5 +1,6 @@
 # from unittest import TestCase
 import os
+import sys
 from collections import defaultdict
 
 from MigrationTools.MetadataReader import cdm_metadata_xml, cleanup_string
@@ -85,4 +86,71 @@ def test_concat_multi_item(CDMdata):
     assert record["unmapped"] == "ALA0001389; University Archives, Room 19 Library; Drawer 3, Folder 8; RS 12/3/12; 2014-01-22"
 
 def test_len_parts(CDMdata):
-    assert len(list(CDMdata.parts())) == 9
\ No newline at end of file
+    assert len(list(CDMdata.parts())) == 9
+
+def test_contains(CDMdata):
+    assert 155 in CDMdata
+    assert 5 not in CDMdata
+
+
+def test_selected_fields():
+    limited = cdm_metadata_xml(TEST_FILE, fields=["title"])
+    assert limited.fields() == ["cdmid", "title"]
+    record = limited.get_record(155)
+    assert record["title"] == "Coretta Scott King Award Wall Calendar"
+    assert record.as_list("description") == []
+    assert set(record.pages[0].keys()) == {"title", "pagetitle", "pageptr"}
+
+
+def test_selected_fields_missing():
+    with pytest.raises(KeyError):
+        cdm_metadata_xml(TEST_FILE, fields=["spam"])
+
+
+def test_single_pass_matches_tree(CDMdata):
+    from xml.etree import ElementTree as ET
+    root = ET.parse(TEST_FILE).getroot()
+    field_names = cdm_metadata_xml.get_field_names(root)
+    expected = [cdm_metadata_xml.build_record(element, field_names) for element in root]
+    assert len(CDMdata.records) == len(expected)
+    for expected_record, record in zip(expected, CDMdata):
+        assert dict(record.data) == dict(expected_record.data)
+        assert record.pages == expected_record.pages
+    assert set(CDMdata.fields()) == field_names
+
+
+def test_iter_file(CDMdata):
+    records = cdm_metadata_xml.iter_file(TEST_FILE)
+    first = next(records)
+    assert first["cdmid"] == "0"
+    streamed = [first] + list(records)
+    assert [record.pages for record in streamed] == [record.pages for record in CDMdata]
+    assert [record["title"] for record in streamed] == [record["title"] for record in CDMdata]
+
+
+def test_part_count(CDMdata):
+    assert CDMdata.part_count() == len(list(CDMdata.parts()))
+
+
+def test_count_parts(CDMdata):
+    records, pages = cdm_metadata_xml.count_parts(TEST_FILE)
+    assert records == len(CDMdata)
+    assert records + pages == CDMdata.part_count()
+
+
+def test_cleanup_string_shares_values():
+    first = cleanup_string("Maps of Africa\n    to 1900 ")
+    second = cleanup_string("".join(["Maps of Africa\n", "    to 1900 "]))
+    assert first == "Maps of Africa to 1900"
+    assert first is second
+
+
+def test_cleanup_string_doesnt_intern():
+    value = cleanup_string("A title only one record has ")
+    assert sys.intern("".join(["A title only one ", "record has"])) is not value
+
+
+def test_records_share_repeated_values(CDMdata):
+    rights = [record["rights"][0] for record in CDMdata.records if record["rights"]]
+    assert len(rights) > 1
+    assert all(value is rights[0] for value in rights if value == rights[0])
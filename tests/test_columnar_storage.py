@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata
+from MigrationTools.ColumnarStorage import ColumnStore, ListRowView
+from MigrationTools.MetadataReader import cdm_metadata_tsv, cdm_metadata_xml
+
+test_file1_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+
+
+def test_values_interned():
+    store = ColumnStore(["Title", "Rights"])
+    store.append({"Title": "a", "Rights": "".join(["Rights ", "statement"])})
+    store.append({"Title": "b", "Rights": "".join(["Rights ", "statement"])})
+    assert store[0]["Rights"] is store[1]["Rights"]
+    assert store[1] == {"Title": "b", "Rights": "Rights statement"}
+
+
+def test_missing_field():
+    store = ColumnStore(["Title"])
+    store.append({"Title": "a"})
+    store.append({"Title": "b", "Creator": "c"})
+    assert store[0]["Creator"] is None
+    assert store.fields == ["Title", "Creator"]
+    with pytest.raises(KeyError):
+        store[0]["spam"]
+
+
+def test_list_view():
+    store = ColumnStore(["description"], default=(), view=ListRowView)
+    store.append({"description": ["a", "b"]})
+    record = store[0]
+    record["description"].append("c")
+    assert record["description"] == ["a", "b"]
+    assert record["spam"] == []
+
+
+def test_tsv_matches_dicts():
+    loaded = cdm_metadata_tsv(test_file1_tsv)
+    columnar = cdm_metadata_tsv(test_file1_tsv, columnar=True)
+    assert len(columnar) == len(loaded)
+    assert columnar.fields == loaded.fields
+    for expected, received in zip(loaded, columnar):
+        assert received == expected
+    assert columnar.get_record(43) == loaded.get_record(43)
+    assert 44 in columnar
+
+
+def test_tsv_with_fields():
+    loaded = cdm_metadata_tsv(test_file1_tsv)
+    columnar = cdm_metadata_tsv(test_file1_tsv, columnar=True)
+    assert list(columnar.with_fields("Title", "Creator")) == list(loaded.with_fields("Title", "Creator"))
+
+
+def test_xml_matches_dicts():
+    loaded = cdm_metadata_xml(test_file_xml)
+    columnar = cdm_metadata_xml(test_file_xml, columnar=True)
+    assert columnar.fields() == loaded.fields()
+    for expected, received in zip(loaded, columnar):
+        assert dict(received) == dict(expected)
+        assert received.pages == expected.pages
+    assert columnar.get_record(155).as_list("description") == loaded.get_record(155).as_list("description")
+
+
+def test_joined_matches_dicts():
+    loaded = list(CDM_Metadata(test_file_xml, test_file_tsv))
+    columnar = list(CDM_Metadata(test_file_xml, test_file_tsv, columnar=True))
+    assert len(columnar) == len(loaded)
+    for expected, received in zip(loaded, columnar):
+        assert dict(received) == dict(expected)
@@ -166,3 +166,106 @@ def test_joined_length(CDMdata_joined):
 def test_joined_missing_exception():
     with pytest.raises(MigrationTools.MetadataReader.RecordMismatch):
         bad = CDM_Metadata(test_file_xml, test_file_missing_tsv)
+
+
+def test_joined_pages_matched(CDMdata_joined):
+    parts = list(CDMdata_joined)
+    assert len(parts) == 9
+    pages = [part for part in parts if 'XML_order' in part]
+    assert [page['CONTENTdm number'] for page in pages] == ['150', '151', '153', '154']
+    assert [page['pagetitle'] for page in pages] == ['Side 1', 'Side 2', 'Side 1', 'Side 2']
+
+
+def test_joined_streaming_tsv(CDMdata_joined):
+    xml_metadata = MigrationTools.cdm_metadata_xml(test_file_xml)
+    tsv_metadata = MigrationTools.cdm_metadata_tsv(test_file_tsv, stream=True)
+    full_records = CDM_Metadata.create_full(xml_metadata=xml_metadata, tsv_metadata=tsv_metadata)
+    expected = CDM_Metadata.create_full(xml_metadata=MigrationTools.cdm_metadata_xml(test_file_xml),
+                                        tsv_metadata=MigrationTools.cdm_metadata_tsv(test_file_tsv))
+    assert [dict(record) for record in full_records] == [dict(record) for record in expected]
+
+
+def test_xml_iterate_compound(CDMdata_xml):
+    parts = list(CDMdata_xml)
+    assert len(parts) == len(CDMdata_xml)
+
+
+@pytest.mark.parametrize("files", [(test_file_xml, test_file_tsv), (test_file1_tsv,), (test_file_xml,)])
+def test_lazy_matches_eager(files):
+    eager = [dict(part) for part in CDM_Metadata(*files)]
+    lazy_metadata = CDM_Metadata(*files, lazy=True)
+    lazy = [dict(part) for part in lazy_metadata]
+    assert lazy == eager
+    assert len(lazy_metadata) == len(eager)
+
+
+def test_lazy_xml_only_has_fields_of_its_record(tmpdir):
+    xml_file = str(tmpdir.join("export.xml"))
+    with open(xml_file, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<metadata>\n'
+                '<record><title>A</title><cdmid>1</cdmid><structure>x</structure></record>\n'
+                '<record><title>B</title><creator>Someone</creator><cdmid>2</cdmid><structure>x</structure></record>\n'
+                '</metadata>\n')
+    eager = [dict(part) for part in CDM_Metadata(xml_file)]
+    lazy = [dict(part) for part in CDM_Metadata(xml_file, lazy=True)]
+    assert eager[0]["creator"] is None
+    assert "creator" not in lazy[0]
+    assert lazy == [{key: value for key, value in part.items() if value is not None} for part in eager]
+
+
+def test_lazy_tsv_doesnt_read_ahead(monkeypatch):
+    def tsv_lookup(tsv_metadata):
+        raise AssertionError("the tsv file was read into a lookup table")
+    monkeypatch.setattr(CDM_Metadata, "tsv_lookup", staticmethod(tsv_lookup))
+    lazy = CDM_Metadata(test_file1_tsv, lazy=True)
+    assert lazy._lookup is None
+    assert lazy.tsv_metadata.records is None
+    assert len(list(lazy)) == len(MigrationTools.cdm_metadata_tsv(test_file1_tsv))
+
+
+def test_lazy_doesnt_load_xml():
+    lazy = CDM_Metadata(test_file_xml, test_file_tsv, lazy=True)
+    assert lazy.xml_metadata is None
+    first = next(iter(lazy))
+    assert first['CONTENTdm number'] == '0'
+
+
+def test_lazy_missing_exception():
+    # exportMissing.tsv lacks the rows of some of the parts, which are only looked up when they're reached
+    lazy = CDM_Metadata(test_file_xml, test_file_missing_tsv, lazy=True)
+    with pytest.raises(IndexError):
+        list(lazy)
+
+
+@pytest.mark.parametrize("files", [(test_file_xml, test_file_tsv), (test_file_xml,)])
+def test_pages_match_merged_dicts(files):
+    metadata = CDM_Metadata(*files)
+    pages = [part for part in metadata if 'XML_order' in part]
+    expected = []
+    for i, object_record in enumerate(metadata.iter_full()):
+        for page_number, page in enumerate(object_record.item_level):
+            santized = {k: ";".join(v) for k, v in page.items()}
+            object_info = {k: v for k, v in dict(object_record.object_level).items() if k not in santized}
+            matching = metadata._lookup(int(santized['pageptr'])) if metadata._lookup is not None else {}
+            expected.append({**object_info, **santized, **matching, 'group_id': i, 'XML_order': page_number + 1})
+    assert [list(page.items()) for page in pages] == [list(page.items()) for page in expected]
+
+
+@pytest.mark.parametrize("files", [(test_file_xml, test_file_tsv), (test_file1_tsv,), (test_file_xml,)])
+def test_counts(files):
+    eager = CDM_Metadata(*files)
+    parts = list(eager)
+    pages = [part for part in parts if 'XML_order' in part]
+    assert eager.page_count == len(pages)
+    assert eager.object_count == len(parts) - len(pages)
+    assert len(eager) == len(parts)
+
+    # Counted by reading through the files without building the records
+    lazy = CDM_Metadata(*files, lazy=True)
+    assert (lazy.object_count, lazy.page_count) == (eager.object_count, eager.page_count)
+
+    # Counted while iterating
+    lazy = CDM_Metadata(*files, lazy=True)
+    list(lazy)
+    assert lazy._object_count == eager.object_count
+    assert len(lazy) == len(eager)
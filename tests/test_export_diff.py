@@ -0,0 +1,77 @@
+import csv
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata
+from MigrationTools.ExportDiff import ADDED, CHANGED, REMOVED, UNCHANGED, ExportSnapshot, iter_changes
+
+test_file1_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+
+
+def rewrite_tsv(source, destination, change):
+    with open(source, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, dialect="excel-tab")
+        fieldnames = reader.fieldnames
+        rows = [row for row in (change(row) for row in reader) if row is not None]
+    with open(destination, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames, dialect="excel-tab")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture()
+def new_export(tmp_path):
+    def change(row):
+        if row["CONTENTdm number"] == "41":
+            return None
+        if row["CONTENTdm number"] == "42":
+            row["Title"] = "Changed"
+            row["Date modified"] = "2020-01-01"
+        if row["CONTENTdm number"] == "50":
+            # Changed without CONTENTdm changing the modification date
+            row["Title"] = "Quietly changed"
+        return row
+    tsv_file = str(tmp_path / "new.tsv")
+    rewrite_tsv(test_file1_tsv, tsv_file, change)
+    with open(tsv_file, "a", encoding="utf-8") as f:
+        f.write("\t".join(["Added"] + [""] * 28 + ["9999", "", ""]) + "\n")
+    return tsv_file
+
+
+def test_unchanged():
+    changes = list(CDM_Metadata(test_file1_tsv).iter_changes(CDM_Metadata(test_file1_tsv)))
+    assert changes == []
+
+
+def test_iter_changes(new_export):
+    previous = ExportSnapshot.from_metadata(CDM_Metadata(test_file1_tsv))
+    changes = {change.key: change.status for change in CDM_Metadata(new_export).iter_changes(previous)}
+    assert changes == {"41": REMOVED, "42": CHANGED, "9999": ADDED}
+
+
+def test_check_content(new_export):
+    changes = {change.key: change.status
+               for change in CDM_Metadata(new_export).iter_changes(CDM_Metadata(test_file1_tsv), check_content=True)}
+    assert changes == {"41": REMOVED, "42": CHANGED, "50": CHANGED, "9999": ADDED}
+
+
+def test_snapshot_saved(new_export, tmp_path):
+    snapshot_file = str(tmp_path / "export.snapshot")
+    ExportSnapshot.from_metadata(CDM_Metadata(test_file1_tsv)).save(snapshot_file)
+
+    snapshot = ExportSnapshot()
+    list(CDM_Metadata(new_export).iter_changes(ExportSnapshot.load(snapshot_file), snapshot=snapshot))
+    assert len(snapshot) == len(CDM_Metadata(new_export))
+    snapshot.save(snapshot_file)
+    assert list(CDM_Metadata(new_export).iter_changes(ExportSnapshot.load(snapshot_file))) == []
+
+
+@pytest.mark.parametrize("files", [(test_file_xml, test_file_tsv), (test_file_xml,)])
+def test_pages_keyed_by_pageptr(files):
+    metadata = CDM_Metadata(*files)
+    statuses = [change.status for change in iter_changes(metadata, metadata, include_unchanged=True)]
+    assert statuses == [UNCHANGED] * len(metadata)
+    assert len(ExportSnapshot.from_metadata(metadata)) == len(metadata)
@@ -0,0 +1,47 @@
+import pytest
+
+from MigrationTools import CDM_Metadata
+from benchmarks.generator import write_export, write_tsv, write_xml
+
+
+@pytest.fixture()
+def export(tmpdir):
+    xml_file = str(tmpdir.join("export.xml"))
+    tsv_file = str(tmpdir.join("export.tsv"))
+    return xml_file, tsv_file, write_export(xml_file, tsv_file, 500, seed=3)
+
+
+def read(filename):
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def test_same_seed_same_files(export, tmpdir):
+    xml_file, tsv_file, summary = export
+    again = write_export(str(tmpdir.join("again.xml")), str(tmpdir.join("again.tsv")), 500, seed=3)
+    assert again == summary
+    assert read(str(tmpdir.join("again.xml"))) == read(xml_file)
+    assert read(str(tmpdir.join("again.tsv"))) == read(tsv_file)
+
+    write_export(str(tmpdir.join("other.xml")), str(tmpdir.join("other.tsv")), 500, seed=4)
+    assert read(str(tmpdir.join("other.tsv"))) != read(tsv_file)
+
+
+def test_single_files_match_pair(export, tmpdir):
+    xml_file, tsv_file, summary = export
+    assert write_xml(str(tmpdir.join("only.xml")), 500, seed=3) == summary
+    assert write_tsv(str(tmpdir.join("only.tsv")), 500, seed=3) == summary
+    assert read(str(tmpdir.join("only.xml"))) == read(xml_file)
+    assert read(str(tmpdir.join("only.tsv"))) == read(tsv_file)
+
+
+def test_pair_joins(export):
+    xml_file, tsv_file, summary = export
+    assert summary.parts == 500
+    assert summary.pages > 0
+    metadata = CDM_Metadata(xml_file, tsv_file)
+    assert metadata.object_count == summary.objects
+    assert metadata.page_count == summary.pages
+    parts = list(metadata)
+    assert len(parts) == summary.parts
+    assert sorted(int(part["CONTENTdm number"]) for part in parts) == sorted(summary.numbers)
@@ -0,0 +1,72 @@
+import io
+import json
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata, Instrumentation
+
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+
+
+@pytest.fixture()
+def instrumentation():
+    Instrumentation.reset()
+    Instrumentation.enable()
+    yield Instrumentation
+    Instrumentation.disable()
+    Instrumentation.reset()
+
+
+def test_phase(instrumentation):
+    for _ in range(2):
+        with instrumentation.phase("work"):
+            sum(range(1000))
+    phase = instrumentation.report()["phases"]["work"]
+    assert phase["calls"] == 2
+    assert phase["wall_seconds"] >= 0
+    assert phase["cpu_seconds"] >= 0
+    assert "work" in instrumentation.report()["memory"]
+
+
+def test_timed_iter(instrumentation):
+    items = list(instrumentation.timed_iter("items", iter(range(5))))
+    assert items == [0, 1, 2, 3, 4]
+    assert instrumentation.report()["phases"]["items"]["calls"] == 1
+
+
+def test_metadata_pipeline(instrumentation):
+    metadata = CDM_Metadata(test_file_xml, test_file_tsv)
+    parts = list(metadata)
+    report = instrumentation.report()
+    for phase in ("cdm_metadata_tsv.load", "cdm_metadata_xml.load", "cdm_metadata_xml.build_record",
+                  "cleanup_string", "CDM_Metadata.join", "CDM_Metadata.iterate"):
+        assert phase in report["phases"]
+
+    counters = report["counters"]
+    assert counters["cdm_metadata_tsv.records"] == len(metadata.tsv_metadata)
+    assert counters["cdm_metadata_xml.records"] == len(metadata.xml_metadata)
+    assert counters["CDM_Metadata.objects"] + counters["CDM_Metadata.pages"] == len(parts)
+    assert counters["CDM_Metadata.lookups"] > 0
+
+
+def test_dump(instrumentation):
+    instrumentation.count("things", 3)
+    output = io.StringIO()
+    instrumentation.dump(output)
+    dumped = json.loads(output.getvalue())
+    assert dumped["enabled"] is True
+    assert dumped["counters"] == {"things": 3}
+    assert "peak" in dumped["memory"]
+
+
+def test_disabled_records_nothing():
+    Instrumentation.reset()
+    assert not Instrumentation.enabled
+    list(CDM_Metadata(test_file_xml, test_file_tsv))
+    items = iter(range(3))
+    assert Instrumentation.timed_iter("items", items) is items
+    report = Instrumentation.report()
+    assert report["phases"] == {}
+    assert report["counters"] == {}
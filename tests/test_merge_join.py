@@ -0,0 +1,119 @@
+import csv
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from MigrationTools import CDM_Metadata, Instrumentation
+from MigrationTools.MergeJoin import iter_merge_join
+from MigrationTools.MetadataReader import RecordMismatch, cdm_metadata_xml
+
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_missing_tsv = os.path.join(os.path.dirname(__file__), "exportMissing.tsv")
+
+
+def write_reordered(tmpdir, order):
+    with open(test_file_tsv, encoding="utf-8", newline="") as f:
+        header, *rows = list(csv.reader(f, dialect="excel-tab"))
+    filename = str(tmpdir.join("reordered.tsv"))
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, dialect="excel-tab")
+        writer.writerow(header)
+        writer.writerows(order(rows))
+    return filename
+
+
+@pytest.fixture()
+def joined():
+    return [dict(part) for part in CDM_Metadata(test_file_xml, test_file_tsv)]
+
+
+@pytest.fixture()
+def instrumentation():
+    Instrumentation.reset()
+    Instrumentation.enable()
+    yield Instrumentation
+    Instrumentation.disable()
+    Instrumentation.reset()
+
+
+def test_merge_join_matches_hash_join(joined, instrumentation):
+    metadata = CDM_Metadata(test_file_xml, test_file_tsv, merge_join=True)
+    assert metadata.lazy
+    assert metadata._lookup is None
+    assert [dict(part) for part in metadata] == joined
+    assert "MergeJoin.fallbacks" not in instrumentation.report()["counters"]
+
+
+def test_object_before_pages(tmpdir, joined, instrumentation):
+    # export.tsv has the rows of an object's pages before the row of the object
+    def objects_first(rows):
+        reordered = []
+        for record in cdm_metadata_xml.iter_file(test_file_xml):
+            pages = [rows.pop(0) for _ in record.pages]
+            reordered.append(rows.pop(0))
+            reordered.extend(pages)
+        return reordered
+    tsv_file = write_reordered(tmpdir, objects_first)
+    assert [dict(part) for part in CDM_Metadata(test_file_xml, tsv_file, merge_join=True)] == joined
+    assert "MergeJoin.fallbacks" not in instrumentation.report()["counters"]
+
+
+def test_out_of_order_falls_back(tmpdir, joined, instrumentation):
+    tsv_file = write_reordered(tmpdir, lambda rows: list(reversed(rows)))
+    assert [dict(part) for part in CDM_Metadata(test_file_xml, tsv_file, merge_join=True)] == joined
+    assert instrumentation.report()["counters"]["MergeJoin.fallbacks"] == 1
+
+
+def test_duplicate_number_uses_first_row(tmpdir, instrumentation):
+    # The first object is in both exports twice, and its second copy in the tsv export has a different title
+    tree = ET.parse(test_file_xml)
+    tree.getroot().insert(1, tree.getroot()[0])
+    xml_file = str(tmpdir.join("duplicated.xml"))
+    tree.write(xml_file, encoding="utf-8")
+    first_parts = 1 + len(next(cdm_metadata_xml.iter_file(test_file_xml)).pages)
+
+    def duplicate_first(rows):
+        copies = [list(row) for row in rows[:first_parts]]
+        for row in copies:
+            row[2] = "Copy"
+        return rows[:first_parts] + copies + rows[first_parts:]
+    tsv_file = write_reordered(tmpdir, duplicate_first)
+
+    hashed = [dict(part) for part in CDM_Metadata(xml_file, tsv_file)]
+    assert "Copy" not in [part["Title"] for part in hashed]
+    assert [dict(part) for part in CDM_Metadata(xml_file, tsv_file, merge_join=True)] == hashed
+    assert instrumentation.report()["counters"]["MergeJoin.fallbacks"] == 1
+
+
+def test_numbers_going_back_fall_back(tmpdir, joined, instrumentation):
+    # Both exports list the second object first, so the rows are in step but the CONTENTdm numbers go back
+    tree = ET.parse(test_file_xml)
+    root = tree.getroot()
+    second = root[1]
+    root.remove(second)
+    root.insert(0, second)
+    xml_file = str(tmpdir.join("swapped.xml"))
+    tree.write(xml_file, encoding="utf-8")
+    first_parts, second_parts = [1 + len(record.pages) for record in cdm_metadata_xml.iter_file(test_file_xml)][:2]
+
+    def swap_first(rows):
+        return rows[first_parts:first_parts + second_parts] + rows[:first_parts] + rows[first_parts + second_parts:]
+    tsv_file = write_reordered(tmpdir, swap_first)
+
+    hashed = [dict(part) for part in CDM_Metadata(xml_file, tsv_file)]
+    assert [dict(part) for part in CDM_Metadata(xml_file, tsv_file, merge_join=True)] == hashed
+    assert instrumentation.report()["counters"]["MergeJoin.fallbacks"] == 1
+
+
+def test_merge_join_mismatch():
+    # exportMissing.tsv lacks the rows of some of the parts
+    with pytest.raises(IndexError):
+        list(iter_merge_join(test_file_xml, test_file_missing_tsv))
+
+
+def test_merge_join_extra_rows(tmpdir):
+    tsv_file = write_reordered(tmpdir, lambda rows: rows + rows[:1])
+    with pytest.raises(RecordMismatch):
+        list(iter_merge_join(test_file_xml, tsv_file))
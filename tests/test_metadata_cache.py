@@ -0,0 +1,81 @@
+import os
+import shutil
+
+import pytest
+
+from MigrationTools import CDM_Metadata
+from MigrationTools.MetadataCache import MetadataCache
+from MigrationTools.MetadataReader import cdm_metadata_tsv, cdm_metadata_xml
+
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+
+
+@pytest.fixture()
+def cache(tmpdir):
+    return MetadataCache(os.path.join(str(tmpdir), "cache"))
+
+
+def test_tsv_cached(cache):
+    first = cdm_metadata_tsv(test_file_tsv, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    second = cdm_metadata_tsv(test_file_tsv, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert list(second) == list(first)
+    assert second.fields == first.fields
+    assert second.get_record(155) == first.get_record(155)
+
+
+def test_xml_cached(cache):
+    first = cdm_metadata_xml(test_file_xml, cache=cache)
+    second = cdm_metadata_xml(test_file_xml, cache=cache)
+    assert cache.hits == 1
+    assert second.fields() == first.fields()
+    assert second.get_record(155).pages == first.get_record(155).pages
+    assert second.get_record(155).as_list("description") == first.get_record(155).as_list("description")
+
+
+def test_readers_dont_share_entries(cache, tmpdir):
+    cdm_metadata_tsv(test_file_tsv, cache=cache)
+    cdm_metadata_xml(test_file_xml, cache=cache)
+    assert cache.hits == 0
+    assert cache.stats()["entries"] == 2
+
+
+def test_joined_cached(cache):
+    CDM_Metadata(test_file_xml, test_file_tsv, cache=cache)
+    joined = CDM_Metadata(test_file_xml, test_file_tsv, cache=cache)
+    assert cache.hits == 2
+    assert len(joined) == 9
+
+
+def test_changed_file_not_used(cache, tmpdir):
+    tsv_file = os.path.join(str(tmpdir), "export.tsv")
+    shutil.copy(test_file_tsv, tsv_file)
+    cdm_metadata_tsv(tsv_file, cache=cache)
+    with open(tsv_file, "a", encoding="utf-8") as f:
+        f.write("\t" * 24 + "9999\t9999.jp2\t/alaposters/image/9999.jp2\n")
+    changed = cdm_metadata_tsv(tsv_file, cache=cache)
+    assert cache.hits == 0
+    assert 9999 in changed
+
+
+def test_use_hash(tmpdir):
+    cache = MetadataCache(str(tmpdir), use_hash=True)
+    assert cache.key(test_file_tsv) == cache.key(test_file_tsv)
+    assert cache.key(test_file_tsv) != MetadataCache(str(tmpdir)).key(test_file_tsv)
+
+
+def test_lru_eviction(tmpdir):
+    cache = MetadataCache(str(tmpdir), max_size=0)
+    cache.put("a", list(range(100)))
+    assert cache.stats()["entries"] == 0
+
+    cache = MetadataCache(str(tmpdir), max_size=10 ** 9)
+    cache.put("a", "a" * 1000)
+    cache.put("b", "b" * 1000)
+    os.utime(os.path.join(str(tmpdir), "a.pickle"), ns=(0, 0))
+    cache.max_size = 1500
+    cache.evict()
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" * 1000
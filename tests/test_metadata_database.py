@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+
+from MigrationTools import cdm_metadata_tsv, cdm_metadata_xml
+from MigrationTools.MetadataDatabase import MetadataDatabase
+
+test_file_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+
+
+@pytest.fixture()
+def tsv_database(tmp_path):
+    database = MetadataDatabase(test_file_tsv, database_file=str(tmp_path / "test.sqlite"))
+    yield database
+    database.close()
+
+
+@pytest.fixture()
+def xml_database(tmp_path):
+    database = MetadataDatabase(test_file_xml, database_file=str(tmp_path / "export.sqlite"), indexes=["title"])
+    yield database
+    database.close()
+
+
+def test_tsv_matches_reader(tsv_database):
+    metadata = cdm_metadata_tsv(test_file_tsv)
+    assert list(tsv_database) == list(metadata)
+    assert tsv_database.fields == metadata.fields
+    assert len(tsv_database) == len(metadata)
+    assert list(tsv_database.with_fields("Title", "Creator")) == list(metadata.with_fields("Title", "Creator"))
+
+
+def test_tsv_get_record(tsv_database):
+    assert tsv_database.get_record(44) == cdm_metadata_tsv(test_file_tsv).get_record(44)
+    assert 44 in tsv_database
+    assert 9999 not in tsv_database
+    with pytest.raises(IndexError):
+        tsv_database.get_record(9999)
+
+
+def test_xml_matches_reader(xml_database):
+    metadata = cdm_metadata_xml(test_file_xml)
+    for received, expected in zip(xml_database, metadata):
+        assert dict(received.data) == dict(expected.data)
+        assert received.pages == expected.pages
+    assert xml_database.fields == metadata.fields()
+    assert list(xml_database.with_fields("title")) == list(metadata.with_fields("title"))
+
+
+def test_xml_get_record(xml_database):
+    record = xml_database.get_record(155)
+    assert record.pages == cdm_metadata_xml(test_file_xml).get_record(155).pages
+    assert xml_database.get_page(153)['pagetitle'] == ['Side 1']
+    with pytest.raises(IndexError):
+        xml_database.get_page(9999)
+
+
+def test_unknown_index(tsv_database):
+    with pytest.raises(KeyError):
+        tsv_database.add_indexes(["spam"])
+
+
+def test_reopen(tmp_path):
+    tsv_file = str(tmp_path / "test.tsv")
+    shutil.copy(test_file_tsv, tsv_file)
+    MetadataDatabase(tsv_file).close()
+    reopened = MetadataDatabase(tsv_file)
+    assert not reopened.ingested
+    assert len(reopened) == len(cdm_metadata_tsv(tsv_file))
+    reopened.close()
+
+    with open(tsv_file, "a", encoding="utf-8") as f:
+        f.write("\t".join(["Added"] + [""] * 31) + "\n")
+    changed = MetadataDatabase(tsv_file)
+    assert changed.ingested
+    assert len(changed) == len(cdm_metadata_tsv(tsv_file))
+    changed.close()
@@ -0,0 +1,109 @@
+import os
+import shutil
+
+import pytest
+
+from MigrationTools.MetadataReader import cdm_metadata_tsv
+from MigrationTools.OffsetIndex import TsvOffsetIndex, row_spans, SIDECAR_EXTENSION
+
+test_file = os.path.join(os.path.dirname(__file__), "test.tsv")
+
+MULTILINE_TSV = 'CONTENTdm number\tTitle\tNotes\r\n' \
+                '1\tFirst\t"A note\r\nover two lines"\r\n' \
+                '2\t"Quoted ""title"""\t"tab\tand\nnewline"\r\n' \
+                '3\tThird\t\r\n'
+
+
+STRAY_QUOTE_TSV = 'CONTENTdm number\tTitle\tDimensions\r\n' \
+                  '1\tFirst\t10" wide\r\n' \
+                  '2\tSecond\t"12"" by\n8"""\r\n' \
+                  '3\tThird "copy"\t5 in.\r\n'
+
+
+@pytest.fixture()
+def tsv_copy(tmpdir):
+    filename = os.path.join(str(tmpdir), "test.tsv")
+    shutil.copy(test_file, filename)
+    return filename
+
+
+@pytest.fixture()
+def multiline_tsv(tmpdir):
+    filename = os.path.join(str(tmpdir), "multiline.tsv")
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        f.write(MULTILINE_TSV)
+    return filename
+
+
+def test_row_spans_quoted_newlines():
+    data = MULTILINE_TSV.encode("utf-8")
+    assert len(list(row_spans(data))) == 4
+
+
+def test_row_spans_stray_quote():
+    data = STRAY_QUOTE_TSV.encode("utf-8")
+    assert len(list(row_spans(data))) == 4
+
+
+def test_stray_quote_matches_loaded(tmpdir):
+    filename = os.path.join(str(tmpdir), "stray.tsv")
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        f.write(STRAY_QUOTE_TSV)
+    loaded = cdm_metadata_tsv(filename)
+    random_access = cdm_metadata_tsv(filename, random_access=True)
+    assert len(random_access) == len(loaded) == 3
+    for record in loaded:
+        assert random_access.get_record(record['CONTENTdm number']) == record
+    assert random_access.get_record(1)['Dimensions'] == '10" wide'
+
+
+def test_multiline_matches_loaded(multiline_tsv):
+    loaded = cdm_metadata_tsv(multiline_tsv)
+    index = TsvOffsetIndex(multiline_tsv)
+    for number in ("1", "2", "3"):
+        assert index.get_record(number) == loaded.get_record(number)
+    assert index.get_record(2)['Title'] == 'Quoted "title"'
+    assert len(index) == 3
+    index.close()
+
+
+def test_random_access_matches_loaded(tsv_copy):
+    loaded = cdm_metadata_tsv(tsv_copy)
+    random_access = cdm_metadata_tsv(tsv_copy, random_access=True)
+    assert random_access.records is None
+    assert len(random_access) == len(loaded)
+    assert random_access.fields == loaded.fields
+    for record in loaded:
+        number = record['CONTENTdm number']
+        assert number in random_access
+        assert random_access.get_record(number) == record
+    assert 1 not in random_access
+    with pytest.raises(IndexError):
+        random_access.get_record(1)
+
+
+def test_sidecar_reused(tsv_copy, monkeypatch):
+    TsvOffsetIndex(tsv_copy).close()
+    assert os.path.exists(tsv_copy + SIDECAR_EXTENSION)
+
+    def fail_scan(self):
+        raise AssertionError("Should have used the saved offsets")
+
+    monkeypatch.setattr(TsvOffsetIndex, "scan", fail_scan)
+    index = TsvOffsetIndex(tsv_copy)
+    assert index.get_record(43)['Title'] == "Map with tributaries to Congo River, Mpozo River"
+    index.close()
+
+
+def test_sidecar_stale(multiline_tsv):
+    TsvOffsetIndex(multiline_tsv).close()
+    with open(multiline_tsv, "a", encoding="utf-8", newline="") as f:
+        f.write("4\tFourth\t\r\n")
+    index = TsvOffsetIndex(multiline_tsv)
+    assert index.get_record(4)['Title'] == "Fourth"
+    index.close()
+
+
+def test_stream_and_random_access():
+    with pytest.raises(ValueError):
+        cdm_metadata_tsv(test_file, stream=True, random_access=True)
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from MigrationTools.MetadataReader import cdm_metadata_xml
+from MigrationTools.ParallelXml import split_records, iter_records_parallel
+from MigrationTools.XmlBackends import available_backends
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), "export.xml")
+
+
+def test_split_records_whole_records():
+    prolog_end, epilogue_start, ranges = split_records(TEST_FILE, 3)
+    with open(TEST_FILE, "rb") as f:
+        data = f.read()
+    assert data[prolog_end:].startswith(b"<record>")
+    assert data[:epilogue_start].endswith(b"</record>")
+    assert ranges[0][0] == prolog_end
+    assert ranges[-1][1] == epilogue_start
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    for start, end in ranges:
+        chunk = data[start:end]
+        assert chunk.count(b"<record>") == chunk.count(b"</record>")
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_matches_serial(workers):
+    serial = cdm_metadata_xml(TEST_FILE)
+    parallel = cdm_metadata_xml(TEST_FILE, workers=workers)
+    assert parallel.fields() == serial.fields()
+    assert len(parallel) == len(serial)
+    for expected, received in zip(serial, parallel):
+        assert dict(received.data) == dict(expected.data)
+        assert received.pages == expected.pages
+    assert parallel.get_record(155)["unmapped"] == serial.get_record(155)["unmapped"]
+
+
+def test_parallel_found_fields():
+    found = set()
+    records = list(iter_records_parallel(TEST_FILE, workers=2, fields=["title", "cdmid"], found_fields=found))
+    assert [record["cdmid"] for record in records] == ["0", "1", "2", "152", "155"]
+    assert "description" in found
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_parallel_root_named_like_record(tmpdir, backend):
+    with open(TEST_FILE, encoding="utf-8") as f:
+        text = f.read().replace("<metadata>", "<records>").replace("</metadata>", "</records>")
+    xml_file = str(tmpdir.join("records.xml"))
+    with open(xml_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    serial = [dict(record.data) for record in cdm_metadata_xml(xml_file, backend=backend)]
+    assert len(serial) == 5
+    parallel = [dict(record.data) for record in cdm_metadata_xml(xml_file, workers=2, backend=backend)]
+    assert parallel == serial
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_parallel_parse_error(tmpdir, backend):
+    xml_file = str(tmpdir.join("broken.xml"))
+    with open(xml_file, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<metadata>\n'
+                '<record><cdmid>1</cdmid></record>\n'
+                '<record><title>Broken</record>\n'
+                '</metadata>\n')
+    with pytest.raises(ValueError, match="Unable to parse"):
+        list(iter_records_parallel(xml_file, workers=2, backend=backend))
@@ -0,0 +1,98 @@
+import os
+import re
+
+import pytest
+
+from MigrationTools import CDM_Metadata, cdm_metadata_tsv, cdm_metadata_xml
+from MigrationTools.Query import AnyValue, Prefix, RecordQuery, Regex
+
+test_file1_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+
+
+@pytest.fixture()
+def CDMdata():
+    return cdm_metadata_tsv(test_file1_tsv)
+
+
+def test_where_equal(CDMdata):
+    expected = [record for record in CDMdata if record['Creator'] == 'Baumann, Oscar' and record['Date'] == '1886']
+    assert len(expected) == 2
+    assert CDMdata.where(Creator='Baumann, Oscar', Date='1886') == expected
+
+
+def test_where_prefix(CDMdata):
+    expected = [record for record in CDMdata if record['CONTENTdm file name'].startswith('10')]
+    assert expected
+    assert CDMdata.where({'CONTENTdm file name': Prefix('10')}) == expected
+
+
+def test_where_regex(CDMdata):
+    expected = [record for record in CDMdata if re.search("Congo", record['Title'])]
+    assert expected
+    assert CDMdata.where(Title=Regex("Congo")) == expected
+
+
+def test_where_any_value(CDMdata):
+    expected = [record for record in CDMdata
+                if 'Congo River--Navigation' in [value.strip() for value in record['Subject'].split(";")]]
+    assert expected
+    assert CDMdata.where(Subject=AnyValue('Congo River--Navigation')) == expected
+    assert CDMdata.where(Subject=AnyValue(Prefix('Congo River'))) == \
+        [record for record in CDMdata
+         if any(value.strip().startswith('Congo River') for value in record['Subject'].split(";"))]
+
+
+def test_where_reuses_index(CDMdata):
+    CDMdata.where(Type='Maps')
+    index = CDMdata._query.index('Type')
+    CDMdata.where(Type='Spam')
+    assert CDMdata._query.index('Type') is index
+
+
+def test_where_add_record(CDMdata):
+    assert CDMdata.where(Creator='Added') == []
+    new_record = {field: "" for field in CDMdata.fields}
+    new_record.update({'CONTENTdm number': '9999', 'Creator': 'Added'})
+    CDMdata.add_record(new_record)
+    assert CDMdata.where(Creator='Added') == [new_record]
+
+
+def test_where_unknown_field(CDMdata):
+    with pytest.raises(KeyError):
+        CDMdata.where(spam='eggs')
+
+
+def test_where_stream(CDMdata):
+    stream = cdm_metadata_tsv(test_file1_tsv, stream=True)
+    assert stream.where(Type='Maps', Date=Prefix('188')) == CDMdata.where(Type='Maps', Date=Prefix('188'))
+
+
+def test_where_xml():
+    metadata = cdm_metadata_xml(test_file_xml)
+    found = metadata.where(cdmid='155')
+    assert found == [metadata.get_record(155)]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_where_cdm_metadata(lazy):
+    metadata = CDM_Metadata(test_file_xml, test_file_tsv, lazy=lazy)
+    pages = metadata.where(pagetitle='Side 1')
+    assert [page['CONTENTdm number'] for page in pages] == ['150', '153']
+    assert [dict(page) for page in metadata.where(XML_order=2)] == \
+        [dict(part) for part in CDM_Metadata(test_file_xml, test_file_tsv) if part.get('XML_order') == 2]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_where_cdm_metadata_unknown_field(lazy):
+    metadata = CDM_Metadata(test_file_xml, test_file_tsv, lazy=lazy)
+    with pytest.raises(KeyError, match="spam"):
+        metadata.where(spam='eggs')
+
+
+def test_record_query_not_indexed():
+    records = [{"Title": "A"}, {"Title": "B"}]
+    query = RecordQuery(iter(records))
+    assert not query.indexed
+    assert query.where({"Title": "B"}) == [{"Title": "B"}]
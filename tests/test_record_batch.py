@@ -0,0 +1,65 @@
+import os
+import pickle
+
+import pytest
+
+from MigrationTools import CDM_Metadata
+from MigrationTools.MetadataReader import cdm_metadata_xml, Record, FullRecord
+from MigrationTools.RecordBatch import RecordBatch
+
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+
+
+@pytest.fixture()
+def xml_records():
+    return list(cdm_metadata_xml(test_file_xml))
+
+
+def test_slots(xml_records):
+    assert not hasattr(xml_records[0], "__dict__")
+    with pytest.raises(AttributeError):
+        xml_records[0].spam = "eggs"
+
+
+def test_pickle_record(xml_records):
+    record = xml_records[3]
+    len(record)
+    restored = pickle.loads(pickle.dumps(record))
+    assert dict(restored.data) == dict(record.data)
+    assert restored.pages == record.pages
+    assert restored["cdmid"] == "152"
+
+
+def test_pickle_full_record():
+    record = FullRecord(Record({"Title": "Poster"}), [{"pageptr": ["1"]}])
+    record["group_id"] = 3
+    restored = pickle.loads(pickle.dumps(record))
+    assert dict(restored) == dict(record)
+    assert restored.additional_info == {"group_id": 3}
+
+
+def test_batch_round_trip(xml_records):
+    restored = pickle.loads(pickle.dumps(RecordBatch(xml_records)))
+    assert len(restored) == len(xml_records)
+    for expected, received in zip(xml_records, restored):
+        assert dict(received.data) == dict(expected.data)
+        assert received.pages == expected.pages
+    assert restored[0]["spam"] is None
+
+
+def test_batch_full_records():
+    joined = CDM_Metadata(test_file_xml, test_file_tsv)
+    full_records = list(joined.iter_full())
+    restored = pickle.loads(pickle.dumps(RecordBatch(full_records)))
+    assert [dict(record) for record in restored] == [dict(record) for record in full_records]
+
+
+def test_batch_smaller(xml_records):
+    assert len(pickle.dumps(RecordBatch(xml_records))) < len(pickle.dumps(xml_records))
+
+
+def test_batch_columnar():
+    columnar = list(cdm_metadata_xml(test_file_xml, columnar=True))
+    restored = pickle.loads(pickle.dumps(RecordBatch(columnar)))
+    assert [dict(record.data) for record in restored] == [dict(record.data) for record in columnar]
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from MigrationTools.MetadataReader import FullRecord, PageView, Record, cdm_metadata_xml
+
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+
+
+@pytest.fixture()
+def compound_record():
+    return cdm_metadata_xml(test_file_xml).get_record(155)
+
+
+@pytest.fixture()
+def full_record():
+    return FullRecord(Record({"Title": "Poster", "CONTENTdm number": "1"}),
+                      [{"pagetitle": ["Side 1"], "pageptr": ["2"]}])
+
+
+def test_full_record_setitem(full_record):
+    assert "group_id" not in full_record
+    full_record["group_id"] = 4
+    assert full_record["group_id"] == 4
+    assert len(full_record) == 5
+    del full_record["group_id"]
+    assert "group_id" not in full_record
+
+
+def test_full_record_additional_info_changed(full_record):
+    len(full_record)
+    full_record.additional_info.update({"XML_order": 1})
+    assert full_record["XML_order"] == 1
+    full_record.additional_info = {"spam": "eggs"}
+    assert full_record["spam"] == "eggs"
+    assert "XML_order" not in full_record
+
+
+def test_full_record_page_added(full_record):
+    assert full_record["pagetitle"] == "Side 1"
+    full_record.item_level.append({"pagetitle": ["Side 2"]})
+    assert full_record["pagetitle"] == "Side 2"
+
+
+def test_full_record_page_replaced(full_record):
+    assert full_record["pagetitle"] == "Side 1"
+    full_record.item_level[0] = {"pagetitle": ["Front"], "pageptr": ["2"]}
+    assert full_record["pagetitle"] == "Front"
+
+
+def test_full_record_page_changed_in_place(full_record):
+    assert full_record["pagetitle"] == "Side 1"
+    full_record.item_level[0]["pagetitle"].append("Back")
+    assert full_record["pagetitle"] == "Side 1;Back"
+    full_record.item_level[0]["pageptr"] = ["3"]
+    assert full_record["pageptr"] == "3"
+
+
+def test_full_record_object_level_changed(full_record):
+    assert full_record["Title"] == "Poster"
+    full_record.object_level.data["Title"] = "Flyer"
+    assert full_record["Title"] == "Flyer"
+    assert len(full_record) == 4
+
+
+def test_full_record_missing_field(full_record):
+    with pytest.raises(KeyError):
+        full_record["spam"]
+    assert "spam" not in full_record
+
+
+def test_record_field_reassigned():
+    record = Record({"Title": ["Poster"]})
+    assert dict(record) == {"Title": "Poster"}
+    record.data["Title"] = ["Flyer"]
+    assert dict(record) == {"Title": "Flyer"}
+    assert str(record) == str({"Title": ["Flyer"]})
+
+
+def test_record_contains_doesnt_add_field(compound_record):
+    fields = len(compound_record.data)
+    assert "spam" not in compound_record
+    assert len(compound_record.data) == fields
+
+
+def test_record_pages_reused(compound_record):
+    first = compound_record.pages
+    second = compound_record.pages
+    assert first == second
+    assert first is not second
+    assert first[0] is second[0]
+
+
+def test_record_page_added(compound_record):
+    length = len(compound_record)
+    compound_record.add_page({"pagetitle": ["Side 3"], "extra": ["x"]})
+    assert len(compound_record.pages) == 3
+    assert len(compound_record) == length + 1
+
+
+@pytest.fixture()
+def page_view():
+    object_info = {"Title": "Poster", "pagetitle": None}
+    page = {"pagetitle": ["Side 1"], "pageptr": ["2"]}
+    return PageView(object_info, page, {"CONTENTdm number": "2"}, {"group_id": 0})
+
+
+def test_page_view_layers(page_view):
+    assert page_view["Title"] == "Poster"
+    assert page_view["pagetitle"] == "Side 1"
+    assert page_view["CONTENTdm number"] == "2"
+    assert list(page_view) == ["Title", "pagetitle", "pageptr", "CONTENTdm number", "group_id"]
+    assert page_view == {"Title": "Poster", "pagetitle": "Side 1", "pageptr": "2", "CONTENTdm number": "2",
+                         "group_id": 0}
+
+
+def test_page_view_changes_stay_in_view(page_view):
+    page_view["Title"] = "Changed"
+    del page_view["pageptr"]
+    assert page_view["Title"] == "Changed"
+    assert "pageptr" not in page_view
+    assert len(page_view) == 4
+    assert page_view._object_level["Title"] == "Poster"
+    assert page_view._page["pageptr"] == ["2"]
+    page_view["pageptr"] = "3"
+    assert page_view["pageptr"] == "3"
+    with pytest.raises(KeyError):
+        del page_view["spam"]
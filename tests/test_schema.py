@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata, cdm_metadata_tsv
+from MigrationTools.Schema import Schema
+
+test_file_tsv = os.path.join(os.path.dirname(__file__), "test.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+
+
+@pytest.fixture()
+def schema():
+    return Schema(["Title", "Creator"])
+
+
+def test_schema_contains(schema):
+    assert "Title" in schema
+    assert "Date" not in schema
+    assert len(schema) == 2
+
+
+def test_schema_sorted_reused(schema):
+    assert schema.sorted == ["Creator", "Title"]
+    assert schema.sorted is schema.sorted
+
+
+def test_schema_update(schema):
+    sorted_fields = schema.sorted
+    assert schema.update(["Title"]) is False
+    assert schema.sorted is sorted_fields
+    assert schema.update(["Date", "Title"]) is True
+    assert schema.sorted == ["Creator", "Date", "Title"]
+    assert isinstance(schema.names, frozenset)
+
+
+def test_schema_sorts_extra_cells_last():
+    assert Schema(["Title", None, "Creator"]).sorted == ["Creator", "Title", None]
+
+
+def test_add_record_updates_schema():
+    metadata = cdm_metadata_tsv(test_file_tsv)
+    assert not metadata.has_field("Added field")
+    metadata.add_record({"CONTENTdm number": "9999", "Added field": "spam"})
+    assert metadata.has_field("Added field")
+    assert "Added field" in metadata.fields
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cdm_metadata_schema_reused(lazy):
+    metadata = CDM_Metadata(test_file_xml, lazy=lazy)
+    assert metadata.schema_snapshot is metadata.schema_snapshot
+    assert metadata.has_field("group_id")
+    assert metadata.has_field("pagetitle")
+    assert metadata.fields == sorted(metadata.fields)
+
+
+def test_cdm_metadata_schema_refreshed():
+    metadata = CDM_Metadata(test_file_xml)
+    full_record = next(metadata.iter_full())
+    full_record["reviewed"] = True
+    full_record.object_level.data["Added field"] = ["spam"]
+    assert not metadata.has_field("reviewed")
+    assert not metadata.has_field("Added field")
+    schema = metadata.refresh_schema()
+    assert metadata.schema_snapshot is schema
+    assert metadata.has_field("reviewed")
+    assert metadata.has_field("Added field")
+    assert metadata.has_field("group_id")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_cdm_metadata_refresh_unchanged(lazy):
+    metadata = CDM_Metadata(test_file_xml, lazy=lazy)
+    fields = metadata.fields
+    list(metadata)
+    assert metadata.refresh_schema().sorted == fields
+    assert metadata.fields == fields
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from MigrationTools import CDM_Metadata, Instrumentation
+from MigrationTools.MetadataReader import RecordMismatch
+from MigrationTools.SpillJoin import available_memory, iter_spilled_join, partitions_for
+
+test_file_tsv = os.path.join(os.path.dirname(__file__), "export.tsv")
+test_file_xml = os.path.join(os.path.dirname(__file__), "export.xml")
+test_file_missing_tsv = os.path.join(os.path.dirname(__file__), "exportMissing.tsv")
+
+
+@pytest.fixture()
+def joined():
+    return CDM_Metadata(test_file_xml, test_file_tsv)
+
+
+def test_over_budget_spills(tmpdir):
+    with pytest.warns(UserWarning, match="can't be met"):
+        metadata = CDM_Metadata(test_file_xml, test_file_tsv, memory_budget=1, temp_dir=str(tmpdir))
+    assert metadata.spill_partitions is not None
+    assert metadata.lazy
+    assert metadata._lookup is None
+
+
+def test_under_budget_joins_in_memory():
+    metadata = CDM_Metadata(test_file_xml, test_file_tsv, memory_budget=2 ** 40)
+    assert metadata.spill_partitions is None
+    assert not metadata.lazy
+
+
+def test_spilled_matches_in_memory(joined, tmpdir):
+    with pytest.warns(UserWarning):
+        metadata = CDM_Metadata(test_file_xml, test_file_tsv, memory_budget=1, temp_dir=str(tmpdir))
+    assert [dict(part) for part in metadata] == [dict(part) for part in joined]
+    assert len(metadata) == len(joined)
+    assert metadata.fields == joined.fields
+    # The temporary files are removed once the join is done
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.parametrize("partitions", [1, 2, 7])
+def test_iter_spilled_join(joined, partitions):
+    expected = list(joined.iter_full())
+    spilled = list(iter_spilled_join(test_file_xml, test_file_tsv, partitions))
+    assert [dict(full_record) for full_record, _ in spilled] == [dict(full_record) for full_record in expected]
+    for (full_record, page_rows), expected_record in zip(spilled, expected):
+        assert full_record.item_level == expected_record.item_level
+        assert len(page_rows) == len(full_record.item_level)
+
+
+def test_spilled_mismatch():
+    with pytest.raises(RecordMismatch):
+        list(iter_spilled_join(test_file_xml, test_file_missing_tsv, 2))
+
+
+def test_partitions_for():
+    size = os.path.getsize(test_file_tsv)
+    assert partitions_for(test_file_tsv, 2 ** 40) == 1
+    assert partitions_for(test_file_tsv, size) > 1
+    with pytest.warns(UserWarning, match="can't be met"):
+        assert partitions_for(test_file_tsv, 0) == 256
+
+
+def test_available_memory_uses_current_memory(monkeypatch):
+    monkeypatch.setattr(Instrumentation, "peak_memory", lambda: 2 ** 30)
+    monkeypatch.setattr(Instrumentation, "current_memory", lambda: 2 ** 20)
+    assert available_memory(2 ** 21) == 2 ** 20
+    assert available_memory(2 ** 19) == 0
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_current_memory():
+    before = Instrumentation.current_memory()
+    data = b"x" * (64 * 1024 * 1024)
+    assert Instrumentation.current_memory() > before
+    del data
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from MigrationTools import XmlBackends
+from MigrationTools.MetadataReader import cdm_metadata_xml
+from MigrationTools.XmlBackends import available_backends, get_backend
+
+TEST_FILE = os.path.join(os.path.dirname(__file__), "export.xml")
+
+NODE_EXPORT = """<?xml version="1.0" encoding="utf-8"?>
+<metadata>
+    <!-- exported by CONTENTdm -->
+    <record>
+        <title>Map of the
+            Congo</title>
+        <cdmid>2</cdmid>
+        <structure>
+            <node>
+                <nodetitle>Part 1</nodetitle>
+                <page>
+                    <pagetitle>Sheet 1</pagetitle>
+                    <pageptr>0</pageptr>
+                    <pagemetadata>
+                        <!-- not a field -->
+                        <title>Sheet 1</title>
+                    </pagemetadata>
+                </page>
+            </node>
+            <node>
+                <nodetitle>Part 2</nodetitle>
+                <page>
+                    <pagetitle>Sheet 2</pagetitle>
+                    <pageptr>1</pageptr>
+                    <pagemetadata>
+                        <title>Sheet 2</title>
+                    </pagemetadata>
+                </page>
+            </node>
+        </structure>
+    </record>
+</metadata>
+"""
+
+
+@pytest.fixture()
+def node_export(tmpdir):
+    filename = str(tmpdir.join("export.xml"))
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(NODE_EXPORT)
+    return filename
+
+
+def records_as_dicts(metadata):
+    return [(dict(record.data), record.pages) for record in metadata.records]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_give_same_records(backend):
+    expected = cdm_metadata_xml(TEST_FILE, backend="etree")
+    metadata = cdm_metadata_xml(TEST_FILE, backend=backend)
+    assert metadata.backend == backend
+    assert records_as_dicts(metadata) == records_as_dicts(expected)
+    assert metadata.fields() == expected.fields()
+    assert cdm_metadata_xml.count_parts(TEST_FILE, backend) == cdm_metadata_xml.count_parts(TEST_FILE, "etree")
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_find_node_pages(node_export, backend):
+    record, = cdm_metadata_xml(node_export, backend=backend).records
+    assert record["title"] == "Map of the Congo"
+    assert [page["pagetitle"] for page in record.pages] == [["Sheet 1"], ["Sheet 2"]]
+    assert record.pages[0] == {"title": ["Sheet 1"], "pagetitle": ["Sheet 1"], "pageptr": ["0"]}
+
+
+def test_default_backend():
+    expected = "lxml" if XmlBackends.lxml_etree is not None else "etree"
+    assert get_backend().name == expected
+
+
+def test_falls_back_without_lxml(monkeypatch):
+    monkeypatch.setattr(XmlBackends, "lxml_etree", None)
+    monkeypatch.setattr(XmlBackends, "_loaded", dict())
+    assert available_backends() == ["etree"]
+    assert cdm_metadata_xml(TEST_FILE).backend == "etree"
+    with pytest.raises(ImportError):
+        get_backend("lxml")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("spam")